@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
 from airport.models import (
     Country,
     City,
@@ -8,27 +13,189 @@ from airport.models import (
     Airplane,
     Crew,
     Flight,
+    FlightSchedule,
     Order,
     Ticket,
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate of the table instead of COUNT(*)
+    for unfiltered change lists of large PostgreSQL tables.
+    """
+
+    exact_count_limit = 100_000
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if connection.vendor != "postgresql" or query.where:
+            return super().count
+
+        table = self.object_list.model._meta.db_table
+        with connection.cursor() as cursor:
+            # Partitioned tables keep their statistics on the partitions
+            cursor.execute(
+                "SELECT SUM(GREATEST(reltuples, 0))::bigint FROM pg_class "
+                "WHERE oid = %s::regclass OR oid IN "
+                "(SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [table, table],
+            )
+            estimate = cursor.fetchone()[0] or 0
+        if estimate < self.exact_count_limit:
+            return super().count
+        return estimate
+
+
+class IdSearchMixin:
+    """
+    Numeric search terms match the primary key and `search_id_fields`
+    exactly, so searching uses indexes. Text terms use `search_fields`
+    unless `search_ids_only` is set.
+    """
+
+    search_id_fields = ()
+    search_ids_only = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.isdigit():
+            query = Q(pk=int(term))
+            for field in self.search_id_fields:
+                query |= Q(**{field: int(term)})
+            return queryset.filter(query), False
+        if term and self.search_ids_only:
+            return queryset.none(), False
+        return super().get_search_results(request, queryset, search_term)
+
+
 class TicketInline(admin.TabularInline):
     model = Ticket
     extra = 1
+    fields = ("flight", "row", "seat")
+    raw_id_fields = ("flight",)
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(IdSearchMixin, admin.ModelAdmin):
     inlines = [TicketInline]
+    list_display = ("id", "user", "created_at")
+    list_select_related = ("user",)
+    raw_id_fields = ("user",)
+    # Fixed date ranges, date_hierarchy would read the distinct dates of
+    # all orders on every load
+    list_filter = (("created_at", admin.DateFieldListFilter),)
+    ordering = ("-id",)
+    search_fields = ("=id",)
+    search_id_fields = ("user_id",)
+    search_ids_only = True
+    search_help_text = "Order or user id"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Ticket)
+class TicketAdmin(IdSearchMixin, admin.ModelAdmin):
+    list_display = ("id", "flight", "row", "seat", "order")
+    list_select_related = (
+        "flight__route__source__closest_big_city",
+        "flight__route__destination",
+        "order",
+    )
+    list_per_page = 100
+    raw_id_fields = ("flight", "order")
+    ordering = ("-id",)
+    search_fields = ("=id",)
+    search_id_fields = ("order_id", "flight_id")
+    search_ids_only = True
+    search_help_text = "Ticket, order or flight id"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Flight)
+class FlightAdmin(IdSearchMixin, admin.ModelAdmin):
+    list_display = (
+        "id",
+        "route",
+        "airplane",
+        "departure_time",
+        "arrival_time",
+        "status",
+        "delay_minutes",
+    )
+    list_filter = ("status", ("departure_time", admin.DateFieldListFilter))
+    # Flight.__str__, used for the action checkboxes, reaches the source city
+    list_select_related = (
+        "route__source__closest_big_city",
+        "route__destination",
+        "airplane",
+    )
+    autocomplete_fields = ("route", "airplane", "crew")
+    raw_id_fields = ("schedule",)
+    search_fields = ("^route__source__name", "^route__destination__name")
+    search_help_text = "Flight id or airport name"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(FlightSchedule)
+class FlightScheduleAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "route",
+        "airplane",
+        "weekdays",
+        "departure",
+        "valid_from",
+        "valid_until",
+    )
+    list_select_related = (
+        "route__source__closest_big_city",
+        "route__destination",
+        "airplane",
+    )
+    autocomplete_fields = ("route", "airplane", "crew")
+
+
+@admin.register(Route)
+class RouteAdmin(IdSearchMixin, admin.ModelAdmin):
+    list_display = ("id", "source", "destination", "distance")
+    list_select_related = (
+        "source__closest_big_city",
+        "destination__closest_big_city",
+    )
+    autocomplete_fields = ("source", "destination")
+    search_fields = ("^source__name", "^destination__name")
+
+
+@admin.register(Airport)
+class AirportAdmin(admin.ModelAdmin):
+    list_display = ("name", "closest_big_city", "latitude", "longitude")
+    list_select_related = ("closest_big_city",)
+    autocomplete_fields = ("closest_big_city",)
+    search_fields = ("^name",)
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ("name", "country")
+    list_select_related = ("country",)
+    search_fields = ("^name",)
+
+
+@admin.register(Airplane)
+class AirplaneAdmin(admin.ModelAdmin):
+    list_display = ("name", "airplane_type", "rows", "seats_in_row")
+    list_select_related = ("airplane_type",)
+    search_fields = ("^name",)
+
+
+@admin.register(Crew)
+class CrewAdmin(admin.ModelAdmin):
+    search_fields = ("^first_name", "^last_name")
 
 
 admin.site.register(Country)
-admin.site.register(City)
-admin.site.register(Airport)
-admin.site.register(Route)
 admin.site.register(AirplaneType)
-admin.site.register(Airplane)
-admin.site.register(Crew)
-admin.site.register(Flight)
-admin.site.register(Ticket)
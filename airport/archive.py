@@ -0,0 +1,117 @@
+"""
+Moves departed flights and their orders out of the hot tables.
+
+Archiving runs in three idempotent steps, each committed in batches:
+
+1. departed flights get a `FlightArchive` snapshot of their detail
+   representation, including taken seats and crew;
+2. orders whose tickets are all on archived flights are copied to
+   `OrderArchive` and deleted together with their tickets;
+3. archived flights without tickets left are deleted, which also
+   removes their crew rows.
+
+Flights sharing an order with a flight that has not departed yet stay
+in the hot tables until that order can be archived.
+"""
+from django.db import transaction
+
+from airport import search_cache
+from airport.models import Flight, FlightArchive, Order, OrderArchive, Ticket
+from airport.serializers import FlightDetailSerializer, OrderSerializer
+
+
+def snapshot_flights(cutoff, batch_size):
+    """Stores snapshots of up to `batch_size` flights departed before cutoff"""
+    flights = list(
+        Flight.objects.filter(departure_time__lt=cutoff)
+        .exclude(id__in=FlightArchive.objects.values("id"))
+        .select_related(
+            "route__source", "route__destination", "airplane__airplane_type"
+        )
+        .prefetch_related("crew", "tickets")
+        .order_by("departure_time", "id")[:batch_size]
+    )
+    FlightArchive.objects.bulk_create(
+        FlightArchive(
+            id=flight.id,
+            departure_time=flight.departure_time,
+            data=FlightDetailSerializer(flight).data,
+        )
+        for flight in flights
+    )
+    return len(flights)
+
+
+def archive_orders(batch_size):
+    """Moves up to `batch_size` orders with only archived flights"""
+    orders = list(
+        Order.objects.filter(
+            id__in=Ticket.objects.filter(
+                flight_id__in=FlightArchive.objects.values("id")
+            ).values("order_id")
+        )
+        .exclude(
+            id__in=Ticket.objects.exclude(
+                flight_id__in=FlightArchive.objects.values("id")
+            ).values("order_id")
+        )
+        .prefetch_related("tickets")
+        .order_by("id")[:batch_size]
+    )
+    if not orders:
+        return 0
+    OrderArchive.objects.bulk_create(
+        OrderArchive(
+            id=order.id,
+            created_at=order.created_at,
+            user_id=order.user_id,
+            data=OrderSerializer(order).data,
+        )
+        for order in orders
+    )
+    # A bulk delete skips Order.delete, so its hooks are run here once
+    # per flight and user
+    Order.objects.filter(id__in=[order.id for order in orders]).delete()
+    flight_ids = {
+        ticket.flight_id for order in orders for ticket in order.tickets.all()
+    }
+    Flight.objects.filter(pk__in=flight_ids).touch()
+    transaction.on_commit(lambda: search_cache.flights_changed(flight_ids))
+    for order in {order.user_id: order for order in orders}.values():
+        order.changed()
+    return len(orders)
+
+
+def delete_archived_flights(batch_size):
+    """Deletes up to `batch_size` archived flights without tickets"""
+    ids = list(
+        Flight.objects.filter(id__in=FlightArchive.objects.values("id"))
+        .exclude(id__in=Ticket.objects.values("flight_id"))
+        .order_by("id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    Flight.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def run_in_batches(step, *args):
+    total = 0
+    while True:
+        with transaction.atomic():
+            count = step(*args)
+        total += count
+        if not count:
+            return total
+
+
+def archive_departed(cutoff, batch_size=500):
+    """
+    Archives flights departed before `cutoff` with their orders.
+    Returns the numbers of (snapshotted flights, archived orders,
+    deleted flights).
+    """
+    return (
+        run_in_batches(snapshot_flights, cutoff, batch_size),
+        run_in_batches(archive_orders, batch_size),
+        run_in_batches(delete_archived_flights, batch_size),
+    )
@@ -0,0 +1,102 @@
+"""
+Concurrency control for ticket booking.
+
+Bookings lock the rows of their flights with SELECT ... FOR UPDATE in
+flight id order, so two orders sharing flights always lock them in the
+same order and cannot deadlock. Waiting for a lock is bounded by
+`BOOKING_LOCK_TIMEOUT` seconds on PostgreSQL. Once the flights are
+locked, requested seats are checked in one query and conflicts are
+reported seat by seat instead of failing on the unique constraint.
+"""
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from airport.models import Flight, Ticket
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class SeatsUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_unavailable"
+
+    def __init__(self, taken):
+        super().__init__()
+        self.detail = {
+            "detail": self.default_detail,
+            "taken": [
+                {"flight": flight_id, "row": row, "seat": seat}
+                for flight_id, row, seat in sorted(taken)
+            ],
+        }
+
+
+class FlightBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The flight is being booked by others, try again."
+    default_code = "flight_busy"
+
+
+def is_lock_timeout(error):
+    cause = error.__cause__
+    code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    return code == LOCK_NOT_AVAILABLE
+
+
+def lock_flights(flight_ids):
+    """
+    Locks the rows of the given flights until the end of the current
+    transaction and returns them by id. Raises FlightBusy when the
+    locks are not granted within BOOKING_LOCK_TIMEOUT.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)",
+                [f"{int(settings.BOOKING_LOCK_TIMEOUT * 1000)}ms"],
+            )
+
+    try:
+        flights = list(
+            Flight.objects.select_for_update(of=("self",))
+            .select_related("airplane")
+            .filter(id__in=flight_ids)
+            .order_by("id")
+        )
+    except OperationalError as error:
+        if is_lock_timeout(error):
+            raise FlightBusy()
+        raise
+    return {flight.id: flight for flight in flights}
+
+
+def taken_seats(seats, flights):
+    """
+    Returns the (flight id, row, seat) triples of `seats` that are sold
+    or requested more than once. `flights` maps ids to Flight objects.
+    """
+    requested = set()
+    duplicates = set()
+    for seat in seats:
+        if seat in requested:
+            duplicates.add(seat)
+        requested.add(seat)
+    if not requested:
+        return duplicates
+
+    query = Q()
+    for flight_id, row, seat in requested:
+        query |= Q(
+            flight_id=flight_id,
+            # Keeps the lookup on the flight's ticket partition
+            flight_departure=flights[flight_id].departure_time,
+            row=row,
+            seat=seat,
+        )
+    return duplicates | set(
+        Ticket.objects.filter(query).values_list("flight_id", "row", "seat")
+    )
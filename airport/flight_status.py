@@ -0,0 +1,203 @@
+"""
+Flight status updates pushed to many watchers.
+
+Saving a flight with a new status, delay or departure time appends a
+FlightStatusChange row. Each process has one `StatusHub` whose thread,
+while anyone is watching, reads the rows logged since its last poll
+every POLL_INTERVAL seconds and puts them on the queues of the
+watchers of those flights. Waiting watchers run no queries and hold no
+database connection, so thousands of them cost one query per interval.
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Max, OuterRef, Q, Subquery
+
+from airport.models import Flight, FlightStatusChange
+from airport.renderers import EventStreamRenderer
+
+
+def get_setting(name):
+    return settings.FLIGHT_STATUS_STREAM[name]
+
+
+def change_event(change):
+    return {
+        "id": change.id,
+        "flight": change.flight_id,
+        "status": change.status,
+        "delay_minutes": change.delay_minutes,
+        "departure_time": change.departure_time,
+    }
+
+
+def current_status(flight_id):
+    """
+    Status of a flight with the id of its latest logged change,
+    or None when the flight does not exist
+    """
+    latest_change = (
+        FlightStatusChange.objects.filter(flight=OuterRef("pk"))
+        .order_by("-id")
+        .values("id")[:1]
+    )
+    return (
+        Flight.objects.filter(pk=flight_id)
+        .annotate(change=Subquery(latest_change))
+        .values("change", "id", "status", "delay_minutes", "departure_time")
+        .first()
+    )
+
+
+def status_event(status):
+    """Converts `current_status()` to the event sent for a change"""
+    event = dict(status, flight=status["id"])
+    event["id"] = event.pop("change")
+    return event
+
+
+class StatusHub:
+    def __init__(self, autostart=True, batch_size=1000):
+        self.autostart = autostart
+        self.batch_size = batch_size
+        self._watchers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_id = None
+        # Ids skipped by the last polls, by the time they are given up.
+        # Sequence values are taken before commit, so a row may appear
+        # after rows with higher ids were already read.
+        self._gaps = {}
+
+    def subscribe(self, flight_id):
+        """Returns a queue receiving the change events of a flight"""
+        watcher = queue.Queue()
+        with self._lock:
+            if self._last_id is None:
+                self._last_id = (
+                    FlightStatusChange.objects.aggregate(last=Max("id"))["last"] or 0
+                )
+            self._watchers[flight_id].add(watcher)
+            if self.autostart and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="flight-status-hub", daemon=True
+                )
+                self._thread.start()
+        return watcher
+
+    def unsubscribe(self, flight_id, watcher):
+        with self._lock:
+            watchers = self._watchers.get(flight_id)
+            if watchers is not None:
+                watchers.discard(watcher)
+                if not watchers:
+                    del self._watchers[flight_id]
+
+    def poll(self):
+        """Delivers the changes logged since the last poll with one query"""
+        with self._lock:
+            last_id = self._last_id
+            gaps = list(self._gaps)
+        if last_id is None:
+            return 0
+
+        query = Q(id__gt=last_id)
+        if gaps:
+            query |= Q(id__in=gaps)
+        changes = list(
+            FlightStatusChange.objects.filter(query).order_by("id")[: self.batch_size]
+        )
+
+        now = time.monotonic()
+        with self._lock:
+            for change in changes:
+                self._gaps.pop(change.id, None)
+                event = change_event(change)
+                for watcher in self._watchers.get(change.flight_id, ()):
+                    watcher.put(event)
+
+            new_ids = [change.id for change in changes if change.id > last_id]
+            if new_ids:
+                give_up_at = now + get_setting("GAP_TIMEOUT")
+                for missing in set(range(last_id + 1, new_ids[-1])) - set(new_ids):
+                    self._gaps[missing] = give_up_at
+                self._last_id = new_ids[-1]
+            self._gaps = {
+                gap: give_up_at
+                for gap, give_up_at in self._gaps.items()
+                if give_up_at > now
+            }
+        return len(changes)
+
+    def run(self):
+        while True:
+            time.sleep(get_setting("POLL_INTERVAL"))
+            with self._lock:
+                if not self._watchers:
+                    # Started again, from the latest change, by the next watcher
+                    self._thread = None
+                    self._last_id = None
+                    self._gaps = {}
+                    break
+            try:
+                self.poll()
+            except DatabaseError:
+                connection.close()
+        connection.close()
+
+
+hub = StatusHub()
+
+
+def stream(flight_id, status, last_event_id=None, status_hub=None):
+    """
+    Server-sent events of a flight: the changes after `last_event_id`
+    when given, otherwise its current `status`, then every change
+    until STREAM_TIMEOUT seconds pass. Clients reconnect afterwards,
+    EventSource sends the Last-Event-ID header on its own.
+    """
+    status_hub = status_hub or hub
+    format_event = EventStreamRenderer.format_event
+    # Subscribed first, so no change is lost while sending the backlog
+    watcher = status_hub.subscribe(flight_id)
+    try:
+        yield f"retry: {get_setting('RETRY')}\n\n"
+
+        if last_event_id is None:
+            events = [status_event(status)]
+        else:
+            events = [
+                change_event(change)
+                for change in FlightStatusChange.objects.filter(
+                    flight_id=flight_id, id__gt=last_event_id
+                ).order_by("id")
+            ]
+        sent = set()
+        for event in events:
+            sent.add(event["id"])
+            yield format_event(event, event="status", event_id=event["id"])
+
+        if not connection.in_atomic_block:
+            connection.close()
+
+        deadline = time.monotonic() + get_setting("STREAM_TIMEOUT")
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = watcher.get(timeout=min(get_setting("HEARTBEAT"), remaining))
+            except queue.Empty:
+                # Comment lines keep proxies from closing idle streams
+                yield ": keep-alive\n\n"
+                continue
+            if event["id"] in sent:
+                continue
+            sent.add(event["id"])
+            yield format_event(event, event="status", event_id=event["id"])
+    finally:
+        status_hub.unsubscribe(flight_id, watcher)
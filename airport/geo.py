@@ -0,0 +1,229 @@
+"""
+Great-circle distances and an in-memory spatial index of airports.
+
+Route distances are computed with the haversine formula for many routes
+at once with NumPy. `AirportIndex` keeps airport coordinates in arrays
+sorted by the cell of a latitude/longitude grid, so radius and nearest
+airport queries compute exact distances only for airports of the cells
+that can be in reach. Nothing here needs PostGIS.
+"""
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from airport.models import EARTH_RADIUS_KM, Airport, Route
+
+# Half of the Earth's circumference, no two points are further apart
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distances in km between points given in degrees"""
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(value, dtype=float)) for value in (lat1, lon1, lat2, lon2)
+    )
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def update_route_distances(routes=None, batch_size=1000):
+    """
+    Sets the distance of routes between airports with coordinates to
+    the rounded great-circle km, one bulk update per batch. Returns the
+    number of routes whose distance changed.
+    """
+    if routes is None:
+        routes = Route.objects.all()
+    rows = (
+        routes.filter(
+            source__latitude__isnull=False,
+            source__longitude__isnull=False,
+            destination__latitude__isnull=False,
+            destination__longitude__isnull=False,
+        )
+        .order_by("id")
+        .values_list(
+            "id",
+            "distance",
+            "source__latitude",
+            "source__longitude",
+            "destination__latitude",
+            "destination__longitude",
+        )
+    )
+
+    changed = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            changed += _update_batch(batch)
+            batch = []
+    if batch:
+        changed += _update_batch(batch)
+    return changed
+
+
+def _update_batch(rows):
+    values = np.array(rows, dtype=float)
+    distances = np.rint(haversine_km(*values[:, 2:].T)).astype(np.int64)
+    stale = distances != values[:, 1]
+    now = timezone.now()
+    Route.objects.bulk_update(
+        [
+            Route(id=int(route_id), distance=int(distance), updated_at=now)
+            for route_id, distance in zip(values[stale, 0], distances[stale])
+        ],
+        ["distance", "updated_at"],
+    )
+    return int(stale.sum())
+
+
+class AirportIndex:
+    def __init__(self, ids, latitudes, longitudes, cell_degrees=1.0):
+        self.cell_degrees = cell_degrees
+        self.grid_rows = math.ceil(180 / cell_degrees)
+        self.grid_columns = math.ceil(360 / cell_degrees)
+
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        rows, columns = self.cell_of(latitudes, longitudes)
+        cells = rows * self.grid_columns + columns
+        order = np.argsort(cells, kind="stable")
+
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.latitudes = latitudes[order]
+        self.longitudes = longitudes[order]
+        self.cells = cells[order]
+
+    @classmethod
+    def load(cls, cell_degrees=1.0):
+        """Index of all airports with coordinates, read with one query"""
+        rows = list(
+            Airport.objects.filter(
+                latitude__isnull=False, longitude__isnull=False
+            ).values_list("id", "latitude", "longitude")
+        )
+        return cls(
+            [airport_id for airport_id, _, _ in rows],
+            [latitude for _, latitude, _ in rows],
+            [longitude for _, _, longitude in rows],
+            cell_degrees,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def cell_of(self, latitudes, longitudes):
+        """Grid (row, column) of coordinates, longitudes wrap around"""
+        rows = np.floor((np.asarray(latitudes) + 90) / self.cell_degrees)
+        columns = np.floor((np.asarray(longitudes) + 180) / self.cell_degrees)
+        return (
+            np.clip(rows, 0, self.grid_rows - 1).astype(np.int64),
+            columns.astype(np.int64) % self.grid_columns,
+        )
+
+    def candidates(self, latitude, longitude, radius_km):
+        """Positions of the airports in cells that may be within the radius"""
+        angle = radius_km / EARTH_RADIUS_KM
+        if angle >= math.pi:
+            return np.arange(len(self.ids))
+
+        lat_min = latitude - math.degrees(angle)
+        lat_max = latitude + math.degrees(angle)
+        row_min, _ = self.cell_of(max(lat_min, -90), 0)
+        row_max, _ = self.cell_of(min(lat_max, 90), 0)
+        grid_rows = np.arange(row_min, row_max + 1)
+
+        # Widest longitude span at the latitude furthest from the equator
+        furthest = math.radians(max(abs(lat_min), abs(lat_max)))
+        if furthest >= math.pi / 2 or math.sin(angle) >= math.cos(furthest):
+            spans = [(0, self.grid_columns - 1)]
+        else:
+            lon_span = math.degrees(math.asin(math.sin(angle) / math.cos(furthest)))
+            first = math.floor((longitude - lon_span + 180) / self.cell_degrees)
+            last = math.floor((longitude + lon_span + 180) / self.cell_degrees)
+            if last - first + 1 >= self.grid_columns:
+                spans = [(0, self.grid_columns - 1)]
+            elif first < 0:
+                spans = [(first + self.grid_columns, self.grid_columns - 1), (0, last)]
+            elif last >= self.grid_columns:
+                spans = [(first, self.grid_columns - 1), (0, last - self.grid_columns)]
+            else:
+                spans = [(first, last)]
+
+        starts = np.concatenate(
+            [grid_rows * self.grid_columns + first for first, _ in spans]
+        )
+        ends = np.concatenate(
+            [grid_rows * self.grid_columns + last for _, last in spans]
+        )
+        lows = np.searchsorted(self.cells, starts, side="left")
+        highs = np.searchsorted(self.cells, ends, side="right")
+        if not len(lows):
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(
+            [np.arange(low, high) for low, high in zip(lows, highs)]
+        ).astype(np.int64)
+
+    def within(self, latitude, longitude, radius_km):
+        """(airport id, km) of airports within the radius, nearest first"""
+        positions = self.candidates(latitude, longitude, radius_km)
+        distances = haversine_km(
+            latitude, longitude, self.latitudes[positions], self.longitudes[positions]
+        )
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return [
+            (int(airport_id), float(distance))
+            for airport_id, distance in zip(
+                self.ids[positions[order]], distances[order]
+            )
+        ]
+
+    def nearest(self, latitude, longitude, count=1, exclude=()):
+        """(airport id, km) of the `count` airports nearest to a point"""
+        radius = 100.0
+        while True:
+            found = [
+                (airport_id, distance)
+                for airport_id, distance in self.within(latitude, longitude, radius)
+                if airport_id not in exclude
+            ]
+            # Airports outside the radius are further than any found
+            if len(found) >= count or radius >= MAX_DISTANCE_KM:
+                return found[:count]
+            radius *= 4
+
+
+_index = None
+_loaded_at = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """
+    The process wide airport index. Rebuilt after GEO_INDEX_TIMEOUT
+    seconds, or when airports change in this process.
+    """
+    global _index, _loaded_at
+    with _lock:
+        now = time.monotonic()
+        if _index is None or now - _loaded_at > settings.GEO_INDEX_TIMEOUT:
+            _index = AirportIndex.load()
+            _loaded_at = now
+        return _index
+
+
+def clear_index():
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from airport.archive import archive_departed
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves flights departed more than --days ago, their tickets, crew "
+        "rows and finished orders into the read-only archive tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Archive flights departed more than this many days ago (default: 90)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows moved per transaction (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--days and --batch-size must be positive")
+
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        snapshots, orders, deleted = archive_departed(cutoff, options["batch_size"])
+        self.stdout.write(
+            f"Archived {snapshots} flights and {orders} orders, "
+            f"removed {deleted} flights from the live tables"
+        )
@@ -0,0 +1,113 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from airport.models import (
+    Airplane,
+    AirplaneType,
+    Airport,
+    City,
+    Country,
+    Flight,
+    Route,
+)
+from airport.serializers import FlightListSerializer, FlightListValuesSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares FlightListSerializer with the values() fast path "
+        "on generated flights (data is rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-sizes",
+            default="10,100,1000",
+            help="Comma separated page sizes (default: 10,100,1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of renders per page size (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(size) for size in options["page_sizes"].split(",")]
+
+        try:
+            with transaction.atomic():
+                self.create_flights(max(page_sizes))
+                for page_size in page_sizes:
+                    self.benchmark(page_size, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def create_flights(count):
+        country = Country.objects.create(name="Benchmark")
+        city = City.objects.create(name="Benchmark", country=country)
+        source = Airport.objects.create(name="Source", closest_big_city=city)
+        destination = Airport.objects.create(name="Destination", closest_big_city=city)
+        route = Route.objects.create(source=source, destination=destination)
+        airplane = Airplane.objects.create(
+            name="Benchmark",
+            rows=30,
+            seats_in_row=6,
+            airplane_type=AirplaneType.objects.create(name="Benchmark"),
+        )
+        now = timezone.now()
+        Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=now + timedelta(hours=i),
+                arrival_time=now + timedelta(hours=i + 2),
+            )
+            for i in range(count)
+        )
+
+    @staticmethod
+    def get_queryset():
+        return Flight.objects.select_related(
+            "route__source", "route__destination", "airplane__airplane_type"
+        ).with_tickets_available()
+
+    def benchmark(self, page_size, repeat):
+        def render_serializer():
+            page = self.get_queryset()[:page_size]
+            return FlightListSerializer(page, many=True).data
+
+        def render_values():
+            serializer = FlightListValuesSerializer()
+            page = serializer.get_rows(self.get_queryset())[:page_size]
+            return serializer.to_representation(page)
+
+        if render_serializer() != render_values():
+            self.stderr.write(f"Output differs for page size {page_size}")
+            return
+
+        serializer_time = self.measure(render_serializer, repeat)
+        values_time = self.measure(render_values, repeat)
+        self.stdout.write(
+            f"page size {page_size:>5}: "
+            f"serializer {repeat / serializer_time:8.1f} pages/s, "
+            f"values {repeat / values_time:8.1f} pages/s, "
+            f"speedup x{serializer_time / values_time:.2f}"
+        )
+
+    @staticmethod
+    def measure(render, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return time.perf_counter() - start
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+PROBE = """
+import json, os, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+import airport_api_service.wsgi
+startup = time.perf_counter() - start
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+settings.ALLOWED_HOSTS = ["testserver"]
+client = Client()
+client.get("/__bench__/")
+start = time.perf_counter()
+for _ in range({requests}):
+    client.get("/__bench__/")
+request = (time.perf_counter() - start) / {requests}
+
+print(json.dumps({{
+    "startup": startup,
+    "request": request,
+    "apps": len(settings.INSTALLED_APPS),
+    "middleware": len(settings.MIDDLEWARE),
+    "debug": settings.DEBUG,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures startup time and per-request middleware overhead "
+        "of every settings profile and of API-only workers "
+        "in a fresh interpreter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests per profile (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        probe = PROBE.format(requests=options["requests"])
+
+        for profile, api_only in (
+            ("dev", "0"),
+            ("test", "0"),
+            ("prod", "0"),
+            ("prod", "1"),
+        ):
+            name = f"{profile}{' (api only)' if api_only == '1' else ''}"
+            env = dict(os.environ, DJANGO_PROFILE=profile, DJANGO_API_ONLY=api_only)
+            result = subprocess.run(
+                [sys.executable, "-c", probe],
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode:
+                self.stderr.write(f"{name}: {result.stderr.strip()}")
+                continue
+
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{name:>15}: startup {stats['startup'] * 1000:7.1f} ms, "
+                f"404 request {stats['request'] * 1000:6.2f} ms, "
+                f"{stats['apps']} apps, {stats['middleware']} middleware, "
+                f"DEBUG={stats['debug']}"
+            )
@@ -0,0 +1,111 @@
+import gzip
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from airport.management.commands.bench_flight_list import (
+    Command as FlightListBenchmark,
+    Rollback,
+)
+from airport.models import Flight, Order, Ticket
+from airport.renderers import FastJSONRenderer
+from airport.serializers import FlightListValuesSerializer, OrderListSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares stdlib and fast JSON rendering and compressed sizes "
+        "of flight and order list payloads (data is rolled back afterwards)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=1000,
+            help="Number of flights and tickets in a payload (default: 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Number of renders per payload (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                payloads = self.create_payloads(options["size"])
+                for name, data in payloads.items():
+                    self.benchmark(name, data, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    @staticmethod
+    def create_payloads(size):
+        FlightListBenchmark.create_flights(size)
+        flights = Flight.objects.order_by("id")[:size]
+
+        user = get_user_model().objects.create_user(
+            email="benchmark@benchmark.test", password="benchmark"
+        )
+        orders = []
+        for flight in flights[: size // 10]:
+            order = Order.objects.create(user=user)
+            orders.append(order)
+            Ticket.objects.bulk_create(
+                Ticket(
+                    row=1,
+                    seat=seat,
+                    flight=flight,
+                    order=order,
+                    flight_departure=flight.departure_time,
+                )
+                for seat in range(1, 7)
+            )
+
+        serializer = FlightListValuesSerializer()
+        flight_rows = serializer.get_rows(FlightListBenchmark.get_queryset())[:size]
+        order_list = Order.objects.filter(user=user).prefetch_related(
+            "tickets__flight__airplane",
+            "tickets__flight__route__source",
+            "tickets__flight__route__destination",
+        )
+        return {
+            "flights": serializer.to_representation(flight_rows),
+            "orders": OrderListSerializer(order_list, many=True).data,
+        }
+
+    def benchmark(self, name, data, repeat):
+        content = JSONRenderer().render(data)
+        if FastJSONRenderer().render(data) != content:
+            self.stderr.write(f"Rendered {name} payload differs")
+            return
+
+        stdlib_time = self.measure(JSONRenderer().render, data, repeat)
+        fast_time = self.measure(FastJSONRenderer().render, data, repeat)
+        sizes = [f"raw {len(content)} B", f"gzip {len(gzip.compress(content))} B"]
+        if brotli is not None:
+            sizes.append(f"br {len(brotli.compress(content, quality=4))} B")
+
+        self.stdout.write(
+            f"{name:>8}: stdlib {stdlib_time * 1000 / repeat:.2f} ms, "
+            f"fast {fast_time * 1000 / repeat:.2f} ms per response "
+            f"(x{stdlib_time / fast_time:.1f}); " + ", ".join(sizes)
+        )
+
+    @staticmethod
+    def measure(render, data, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            render(data)
+        return time.perf_counter() - start
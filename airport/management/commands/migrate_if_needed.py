@@ -0,0 +1,44 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from airport_api_service.health import pending_migrations
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs migrate only if some migration files are not applied yet, "
+        "skipping the migration graph when everything is up to date"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to migrate (default: default)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with an error if migrations are pending instead of applying",
+        )
+
+    def handle(self, *args, **options):
+        pending = pending_migrations(options["database"])
+
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("All migrations applied"))
+            return
+
+        if options["check"]:
+            raise CommandError(
+                "Pending migrations: "
+                + ", ".join(f"{app}.{name}" for app, name in sorted(pending))
+            )
+
+        call_command(
+            "migrate",
+            database=options["database"],
+            interactive=False,
+            verbosity=options["verbosity"],
+        )
@@ -0,0 +1,13 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.models import RateCounter
+
+
+class Command(BaseCommand):
+    help = "Deletes the rate throttle counters of clients idle for two windows"
+
+    def handle(self, *args, **options):
+        deleted, _ = RateCounter.objects.filter(expires__lt=time.time()).delete()
+        self.stdout.write(f"Deleted {deleted} rate counters")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from airport.geo import update_route_distances
+
+
+class Command(BaseCommand):
+    help = (
+        "Sets the distance of every route between airports with "
+        "coordinates to the great-circle distance in km"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Routes computed and updated at once (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        changed = update_route_distances(batch_size=options["batch_size"])
+        self.stdout.write(f"Updated the distance of {changed} routes")
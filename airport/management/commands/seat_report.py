@@ -0,0 +1,87 @@
+import csv
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.models import Flight
+from airport.seat_map import SeatMaps
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a CSV report of capacity, sold seats, load factor, "
+        "full rows and adjacent free seats for every flight"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            default=None,
+            help="Only flights departing on or after this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            default=None,
+            help="Only flights departing before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--adjacent",
+            type=int,
+            default=4,
+            help="Size of the free seat blocks counted per flight (default: 4)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Flights loaded into one seat map array (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        flights = Flight.objects.order_by("id")
+        try:
+            if options["date_from"]:
+                date_from = datetime.strptime(options["date_from"], "%Y-%m-%d")
+                flights = flights.filter(departure_time__date__gte=date_from)
+            if options["date_to"]:
+                date_to = datetime.strptime(options["date_to"], "%Y-%m-%d")
+                flights = flights.filter(departure_time__date__lt=date_to)
+        except ValueError as error:
+            raise CommandError(error)
+
+        adjacent = options["adjacent"]
+        writer = csv.writer(self.stdout)
+        writer.writerow(
+            [
+                "flight",
+                "capacity",
+                "sold",
+                "available",
+                "load_factor",
+                "full_rows",
+                f"blocks_of_{adjacent}",
+            ]
+        )
+
+        ids = list(flights.values_list("id", flat=True))
+        for start in range(0, len(ids), options["batch_size"]):
+            batch = ids[start : start + options["batch_size"]]
+            seat_maps = SeatMaps.load(Flight.objects.filter(id__in=batch))
+            full_rows = (seat_maps.row_fill() == 1).sum(axis=1)
+            blocks = seat_maps.adjacent_blocks(adjacent).sum(axis=(1, 2))
+            writer.writerows(
+                zip(
+                    seat_maps.flight_ids.tolist(),
+                    seat_maps.capacity().tolist(),
+                    seat_maps.sold().tolist(),
+                    seat_maps.available().tolist(),
+                    seat_maps.load_factors().round(3).tolist(),
+                    full_rows.tolist(),
+                    blocks.tolist(),
+                )
+            )
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def default_workers():
+    return int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+
+def default_threads():
+    # Each open flight status stream holds a thread of its worker
+    return int(os.environ.get("WEB_THREADS", 32))
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the production gunicorn server. "
+        "Send SIGHUP to the master process for a graceful reload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=os.environ.get("BIND", "0.0.0.0:8000"),
+            help="Address to listen on (default: 0.0.0.0:8000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=default_workers(),
+            help="Number of worker processes (default: WEB_CONCURRENCY or 2*CPU+1)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=default_threads(),
+            help=(
+                "Threads per worker, each open status stream holds one "
+                "(default: WEB_THREADS or 32). 1 uses sync workers"
+            ),
+        )
+        parser.add_argument(
+            "--keep-alive",
+            type=int,
+            default=5,
+            help="Seconds to keep idle connections open (default: 5)",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=1000,
+            help="Recycle a worker after this many requests, 0 disables",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=100,
+            help="Random jitter added to --max-requests (default: 100)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=30,
+            help="Seconds before a silent worker is killed (default: 30)",
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=30,
+            help="Seconds workers get to finish requests on reload (default: 30)",
+        )
+        parser.add_argument(
+            "--pidfile",
+            default=None,
+            help="Write the master pid to this file (used for reloads)",
+        )
+        parser.add_argument(
+            "--preload",
+            action="store_true",
+            help="Load the application before forking workers",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError("gunicorn is required: pip install gunicorn")
+
+        config = {
+            "bind": options["bind"],
+            "workers": options["workers"],
+            "threads": options["threads"],
+            "worker_class": "gthread" if options["threads"] > 1 else "sync",
+            "keepalive": options["keep_alive"],
+            "max_requests": options["max_requests"],
+            "max_requests_jitter": options["max_requests_jitter"],
+            "timeout": options["timeout"],
+            "graceful_timeout": options["graceful_timeout"],
+            "pidfile": options["pidfile"],
+            "preload_app": options["preload"],
+            "accesslog": "-",
+        }
+
+        class Server(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                # Imported in workers so a graceful reload picks up new code
+                from airport_api_service.wsgi import application
+
+                return application
+
+        Server().run()
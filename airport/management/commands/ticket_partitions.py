@@ -0,0 +1,76 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from airport import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates monthly ticket partitions ahead of time and "
+        "detaches partitions of old flights (PostgreSQL only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=3,
+            help="Create partitions up to this many months ahead (default: 3)",
+        )
+        parser.add_argument(
+            "--retain",
+            type=int,
+            default=None,
+            help="Detach partitions older than this many months (default: keep all)",
+        )
+        parser.add_argument(
+            "--archive-schema",
+            default="archive",
+            help="Schema detached partitions are moved to (default: archive)",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of archiving them",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Ticket partitioning requires PostgreSQL")
+        if not partitions.is_partitioned(connection):
+            raise CommandError(f"{partitions.TABLE} is not a partitioned table")
+        if not re.fullmatch(r"[a-z_][a-z0-9_]*", options["archive_schema"]):
+            raise CommandError("--archive-schema must be a lowercase identifier")
+
+        current = partitions.month_start(timezone.now())
+
+        with transaction.atomic():
+            existing = partitions.list_partitions(connection)
+            months = {
+                partitions.add_months(current, offset)
+                for offset in range(options["ahead"] + 1)
+            }
+            months.update(partitions.default_partition_months(connection))
+
+            for month in sorted(months - existing.keys()):
+                name = partitions.create_partition(connection, month)
+                self.stdout.write(f"Created {name}")
+
+            if options["retain"] is None:
+                return
+
+            oldest = partitions.add_months(current, -options["retain"])
+            for month in sorted(partitions.list_partitions(connection)):
+                if month >= oldest:
+                    continue
+                name = partitions.detach_partition(
+                    connection,
+                    month,
+                    archive_schema=options["archive_schema"],
+                    drop=options["drop"],
+                )
+                action = "Dropped" if options["drop"] else "Archived"
+                self.stdout.write(f"{action} {name}")
@@ -1,18 +1,74 @@
+import random
 import time
-from django.core.management.base import BaseCommand
-from django.db import connections
-from django.db.utils import OperationalError
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+from airport_api_service.health import pending_migrations, ping_database
 
 
 class Command(BaseCommand):
+    help = (
+        "Waits until the database answers SELECT 1, retrying with "
+        "exponential backoff and jitter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to wait for (default: default)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait before giving up (default: 60)",
+        )
+        parser.add_argument(
+            "--initial-delay",
+            type=float,
+            default=0.5,
+            help="First retry delay in seconds (default: 0.5)",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=10,
+            help="Upper bound of a retry delay in seconds (default: 10)",
+        )
+        parser.add_argument(
+            "--check-migrations",
+            action="store_true",
+            help="Fail if the database has unapplied migrations",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database")
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options["timeout"]
+        delay = options["initial_delay"]
+
+        while True:
             try:
-                db_conn = connections["default"]
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second")
-                time.sleep(1)
+                ping_database(options["database"])
+                break
+            except DatabaseError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']} seconds: "
+                        f"{error}"
+                    )
+                # Full jitter keeps restarting containers from retrying in sync
+                sleep = min(random.uniform(0, delay), remaining)
+                self.stdout.write(f"Database unavailable, waiting {sleep:.1f} seconds")
+                time.sleep(sleep)
+                delay = min(delay * 2, options["max_delay"])
+
+        self.stdout.write(self.style.SUCCESS("Database available"))
 
-            self.stdout.write(self.style.SUCCESS("Database available"))
+        if options["check_migrations"]:
+            pending = pending_migrations(options["database"])
+            if pending:
+                raise CommandError(f"{len(pending)} migrations are not applied")
+            self.stdout.write(self.style.SUCCESS("All migrations applied"))
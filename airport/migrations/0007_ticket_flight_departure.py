@@ -0,0 +1,98 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+PARTITION_TICKET_TABLE = """
+ALTER TABLE airport_ticket RENAME TO airport_ticket_unpartitioned;
+CREATE SEQUENCE airport_ticket_partitioned_id_seq;
+CREATE TABLE airport_ticket (
+    id bigint NOT NULL DEFAULT nextval('airport_ticket_partitioned_id_seq'),
+    "row" integer NOT NULL,
+    seat integer NOT NULL,
+    flight_id bigint NOT NULL
+        REFERENCES airport_flight (id) DEFERRABLE INITIALLY DEFERRED,
+    order_id bigint NOT NULL
+        REFERENCES airport_order (id) DEFERRABLE INITIALLY DEFERRED,
+    flight_departure timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, flight_departure),
+    UNIQUE (flight_id, "row", seat, flight_departure)
+) PARTITION BY RANGE (flight_departure);
+ALTER SEQUENCE airport_ticket_partitioned_id_seq OWNED BY airport_ticket.id;
+CREATE INDEX airport_ticket_order_id_idx ON airport_ticket (order_id);
+CREATE TABLE airport_ticket_default PARTITION OF airport_ticket DEFAULT;
+INSERT INTO airport_ticket (id, "row", seat, flight_id, order_id, flight_departure)
+    SELECT id, "row", seat, flight_id, order_id, flight_departure
+    FROM airport_ticket_unpartitioned;
+SELECT setval(
+    'airport_ticket_partitioned_id_seq',
+    COALESCE((SELECT MAX(id) FROM airport_ticket), 0) + 1,
+    false
+);
+DROP TABLE airport_ticket_unpartitioned;
+ALTER SEQUENCE airport_ticket_partitioned_id_seq RENAME TO airport_ticket_id_seq;
+"""
+
+UNPARTITION_TICKET_TABLE = """
+ALTER TABLE airport_ticket RENAME TO airport_ticket_partitioned;
+ALTER SEQUENCE airport_ticket_id_seq OWNED BY NONE;
+CREATE TABLE airport_ticket (
+    id bigint NOT NULL DEFAULT nextval('airport_ticket_id_seq') PRIMARY KEY,
+    "row" integer NOT NULL,
+    seat integer NOT NULL,
+    flight_id bigint NOT NULL
+        REFERENCES airport_flight (id) DEFERRABLE INITIALLY DEFERRED,
+    order_id bigint NOT NULL
+        REFERENCES airport_order (id) DEFERRABLE INITIALLY DEFERRED,
+    flight_departure timestamp with time zone NOT NULL,
+    UNIQUE (flight_id, "row", seat)
+);
+ALTER SEQUENCE airport_ticket_id_seq OWNED BY airport_ticket.id;
+CREATE INDEX airport_ticket_flight_id_idx ON airport_ticket (flight_id);
+CREATE INDEX airport_ticket_order_id_idx ON airport_ticket (order_id);
+INSERT INTO airport_ticket (id, "row", seat, flight_id, order_id, flight_departure)
+    SELECT id, "row", seat, flight_id, order_id, flight_departure
+    FROM airport_ticket_partitioned;
+DROP TABLE airport_ticket_partitioned;
+"""
+
+
+def copy_flight_departure(apps, schema_editor):
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    Ticket.objects.update(
+        flight_departure=Subquery(
+            Flight.objects.filter(pk=OuterRef("flight_id")).values("departure_time")[:1]
+        )
+    )
+
+
+def partition_ticket_table(apps, schema_editor):
+    # Declarative partitioning is PostgreSQL only
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(PARTITION_TICKET_TABLE)
+
+
+def unpartition_ticket_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(UNPARTITION_TICKET_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0006_alter_country_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="flight_departure",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_flight_departure, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ticket",
+            name="flight_departure",
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.RunPython(partition_ticket_table, unpartition_ticket_table),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.0.7 on 2026-10-19 10:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0008_flightarchive_orderarchive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="delay_minutes",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="flight",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("scheduled", "Scheduled"),
+                    ("delayed", "Delayed"),
+                    ("boarding", "Boarding"),
+                    ("departed", "Departed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="scheduled",
+                max_length=16,
+            ),
+        ),
+        migrations.CreateModel(
+            name="FlightStatusChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("scheduled", "Scheduled"),
+                            ("delayed", "Delayed"),
+                            ("boarding", "Boarding"),
+                            ("departed", "Departed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("delay_minutes", models.PositiveIntegerField()),
+                ("departure_time", models.DateTimeField()),
+                ("changed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "flight",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_changes",
+                        to="airport.flight",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.7 on 2026-10-19 10:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_column_index(model_name, column):
+    """
+    Drops the single column index of a foreign key. Altering the field
+    would drop and re-add, i.e. revalidate, the foreign key of the whole
+    table just to drop its index.
+    """
+
+    def forwards(apps, schema_editor):
+        table = apps.get_model("airport", model_name)._meta.db_table
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+        for name, constraint in constraints.items():
+            if (
+                constraint["index"]
+                and not constraint["unique"]
+                and not constraint["primary_key"]
+                and constraint["columns"] == [column]
+            ):
+                schema_editor.execute(
+                    schema_editor.sql_delete_index
+                    % {
+                        "table": schema_editor.quote_name(table),
+                        "name": schema_editor.quote_name(name),
+                    }
+                )
+
+    def backwards(apps, schema_editor):
+        model = apps.get_model("airport", model_name)
+        field = next(field for field in model._meta.fields if field.column == column)
+        schema_editor.execute(schema_editor._create_index_sql(model, fields=[field]))
+
+    return migrations.RunPython(forwards, backwards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0012_order_user_created_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["order", "flight"],
+                include=("id", "flight_departure", "row", "seat"),
+                name="airport_ticket_order_flight",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                drop_column_index("Order", "user_id"),
+                drop_column_index("Ticket", "order_id"),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="order",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="ticket",
+                    name="order",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tickets",
+                        to="airport.order",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.7 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0014_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateCounter",
+            fields=[
+                (
+                    "key",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("period", models.BigIntegerField()),
+                ("current", models.PositiveIntegerField(default=0)),
+                ("previous", models.PositiveIntegerField(default=0)),
+                ("allowed", models.BooleanField(default=True)),
+                ("expires", models.BigIntegerField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-19 11:16
+
+from django.db import migrations, models
+
+# Admin prefix searches (`^name`) filter with UPPER(column) LIKE 'X%',
+# which only an index on the same expression with pattern ops can serve
+# whatever the database collation
+NAME_SEARCH_COLUMNS = [
+    ("airport_airport", "name"),
+    ("airport_city", "name"),
+    ("airport_airplane", "name"),
+    ("airport_crew", "first_name"),
+    ("airport_crew", "last_name"),
+]
+
+
+def create_name_search_indexes(apps, schema_editor):
+    # Operator classes are PostgreSQL only
+    if schema_editor.connection.vendor == "postgresql":
+        for table, column in NAME_SEARCH_COLUMNS:
+            schema_editor.execute(
+                f"CREATE INDEX {table}_{column}_upper_like "
+                f"ON {table} (UPPER({column}) text_pattern_ops)"
+            )
+
+
+def drop_name_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for table, column in NAME_SEARCH_COLUMNS:
+            schema_editor.execute(f"DROP INDEX {table}_{column}_upper_like")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0015_rate_counter"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["departure_time"], name="airport_flight_departure"
+            ),
+        ),
+        migrations.RunPython(create_name_search_indexes, drop_name_search_indexes),
+    ]
@@ -1,14 +1,37 @@
+import datetime
+import math
 import pathlib
 import uuid
 
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 
+from airport import search_cache
 from airport_api_service import settings
 
+UNIQUE_VIOLATION = "23505"
+
+# Mean Earth radius used for great-circle distances
+EARTH_RADIUS_KM = 6371.0088
+
+
+def is_unique_violation(error):
+    """Whether an IntegrityError comes from a unique constraint"""
+    cause = error.__cause__
+    code = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    if code is not None:
+        return code == UNIQUE_VIOLATION
+    return "UNIQUE constraint failed" in str(error)
+
 
 class Country(models.Model):
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -24,6 +47,7 @@ class City(models.Model):
         on_delete=models.CASCADE,
         related_name="cities",
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -39,10 +63,75 @@ class Airport(models.Model):
         on_delete=models.CASCADE,
         related_name="airports",
     )
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        airport = super().from_db(db, field_names, values)
+        airport._saved_coordinates = airport.get_coordinates()
+        return airport
 
     def __str__(self):
         return f"{self.name} - {self.closest_big_city}"
 
+    def get_coordinates(self):
+        return self.__dict__.get("latitude"), self.__dict__.get("longitude")
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def distance_to(self, other):
+        """Great-circle distance in km, None unless both have coordinates"""
+        if not (self.has_coordinates and other.has_coordinates):
+            return None
+        lat1, lon1, lat2, lon2 = map(
+            math.radians,
+            (self.latitude, self.longitude, other.latitude, other.longitude),
+        )
+        a = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        moved = self.get_coordinates() != getattr(
+            self, "_saved_coordinates", (None, None)
+        )
+        self._saved_coordinates = self.get_coordinates()
+        if moved:
+            Airport.coordinates_changed([self])
+
+    def delete(self, *args, **kwargs):
+        from airport import geo
+
+        result = super().delete(*args, **kwargs)
+        transaction.on_commit(geo.clear_index)
+        return result
+
+    @staticmethod
+    def coordinates_changed(airports):
+        """Updates the routes of saved airports that moved"""
+        # NumPy is imported on first use to keep worker startup fast
+        from airport import geo
+
+        geo.update_route_distances(
+            Route.objects.filter(Q(source__in=airports) | Q(destination__in=airports))
+        )
+        transaction.on_commit(geo.clear_index)
+
 
 class Route(models.Model):
     source = models.ForeignKey(
@@ -53,15 +142,27 @@ class Route(models.Model):
     destination = models.ForeignKey(
         Airport, on_delete=models.CASCADE, related_name="destination_routers"
     )
-    distance = models.IntegerField(default=0)
+    # Great-circle km, computed when both airports have coordinates
+    distance = models.IntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.source.name} - {self.destination.name} " f"({self.distance} km.)"
 
+    def save(self, *args, **kwargs):
+        self.set_distance()
+        super().save(*args, **kwargs)
+
+    def set_distance(self):
+        distance = self.source.distance_to(self.destination)
+        if distance is not None:
+            self.distance = round(distance)
+
 
 class Crew(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -69,9 +170,17 @@ class Crew(models.Model):
     def __str__(self):
         return self.full_name()
 
+    def save(self, *args, **kwargs):
+        renamed = not self._state.adding
+        super().save(*args, **kwargs)
+        if renamed:
+            # Flights are rendered with their crew
+            Flight.objects.filter(crew=self).touch()
+
 
 class AirplaneType(models.Model):
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -95,6 +204,7 @@ class Airplane(models.Model):
         related_name="airplanes",
     )
     image = models.ImageField(null=True, upload_to=airplane_image_path)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
@@ -107,7 +217,120 @@ class Airplane(models.Model):
         return self.name
 
 
+class FlightQuerySet(models.QuerySet):
+    def with_tickets_available(self):
+        """
+        Annotates free seats. Sold tickets are counted by a correlated
+        subquery on the partition key, so PostgreSQL only visits
+        the ticket partition of each flight's departure month.
+        """
+        sold = (
+            Ticket.objects.filter(
+                flight=OuterRef("pk"),
+                flight_departure=OuterRef("departure_time"),
+            )
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return self.annotate(
+            tickets_available=F("airplane__rows") * F("airplane__seats_in_row")
+            - Coalesce(Subquery(sold), 0)
+        )
+
+    def touch(self):
+        """Marks the flights as changed, e.g. when tickets are sold"""
+        return self.update(updated_at=timezone.now())
+
+    def update(self, **kwargs):
+        """
+        Also moves the tickets of rescheduled flights to their new
+        partition key, as Flight.save does, since the seat counts
+        above look tickets up by it.
+        """
+        if "departure_time" not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            flight_ids = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            departure = Subquery(
+                Flight.objects.filter(pk=OuterRef("flight_id")).values("departure_time")
+            )
+            Ticket.objects.filter(flight_id__in=flight_ids).exclude(
+                flight_departure=departure
+            ).update(flight_departure=departure)
+        return rows
+
+
+class FlightSchedule(models.Model):
+    """
+    Flights departing at the same time on some weekdays of a period.
+    Departures are listed by the flight search and saved as Flight
+    rows only when their first ticket is sold.
+    """
+
+    route = models.ForeignKey(
+        Route,
+        on_delete=models.CASCADE,
+        related_name="schedules",
+    )
+    airplane = models.ForeignKey(
+        Airplane,
+        on_delete=models.CASCADE,
+        related_name="schedules",
+    )
+    weekdays = models.CharField(
+        max_length=7,
+        default="1234567",
+        validators=[RegexValidator(r"^[1-7]{1,7}$")],
+        help_text="ISO weekdays the flight departs on, 1 is Monday",
+    )
+    departure = models.TimeField()
+    duration = models.DurationField()
+    valid_from = models.DateField()
+    valid_until = models.DateField()
+    crew = models.ManyToManyField(Crew, related_name="schedules", blank=True)
+
+    class Meta:
+        ordering = ["valid_from", "departure"]
+
+    def __str__(self):
+        return f"{self.route} at {self.departure:%H:%M} on {self.weekdays}"
+
+    def runs_on(self, date):
+        return (
+            self.valid_from <= date <= self.valid_until
+            and str(date.isoweekday()) in self.weekdays
+        )
+
+    def build_flight(self, date):
+        """Unsaved Flight of the departure on `date`"""
+        departure_time = timezone.make_aware(
+            datetime.datetime.combine(date, self.departure)
+        )
+        return Flight(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + self.duration,
+            schedule=self,
+            schedule_date=date,
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        transaction.on_commit(search_cache.schedule_changed)
+
+
 class Flight(models.Model):
+    class Status(models.TextChoices):
+        SCHEDULED = "scheduled"
+        DELAYED = "delayed"
+        BOARDING = "boarding"
+        DEPARTED = "departed"
+        CANCELLED = "cancelled"
+
     route = models.ForeignKey(
         Route,
         on_delete=models.CASCADE,
@@ -121,9 +344,43 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights")
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.SCHEDULED,
+    )
+    delay_minutes = models.PositiveIntegerField(default=0)
+    # Set on flights saved from a schedule when their first ticket is sold
+    schedule = models.ForeignKey(
+        FlightSchedule,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="flights",
+    )
+    schedule_date = models.DateField(null=True, blank=True)
+    # Also set when the flight's tickets or crew members change
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FlightQuerySet.as_manager()
+
+    # Changes of these fields are logged for the flight status stream
+    status_fields = ("status", "delay_minutes", "departure_time")
+    # Changes of these fields change which searches list the flight
+    search_fields = ("route_id", "airplane_id", "departure_time")
 
     class Meta:
         ordering = ["-departure_time"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "schedule_date"],
+                name="airport_flight_schedule_date_unique",
+            )
+        ]
+        indexes = [
+            # Default ordering and the admin's date filter
+            models.Index(fields=["departure_time"], name="airport_flight_departure"),
+        ]
 
     def __str__(self):
         return (
@@ -131,6 +388,70 @@ class Flight(models.Model):
             f"{self.departure_time} -> {self.arrival_time}"
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        flight = super().from_db(db, field_names, values)
+        flight._saved_status = flight.get_status_values()
+        flight._saved_search = flight.get_search_values()
+        return flight
+
+    def get_status_values(self):
+        return tuple(self.__dict__.get(name) for name in self.status_fields)
+
+    def get_search_values(self):
+        return tuple(self.__dict__.get(name) for name in self.search_fields)
+
+    def save(self, *args, **kwargs):
+        rescheduled = not self._state.adding
+        # New flights, schedule departures included, join cached searches
+        # that do not list them yet
+        relisted = not rescheduled or (
+            self.get_search_values() != getattr(self, "_saved_search", None)
+        )
+        super().save(*args, **kwargs)
+        if rescheduled:
+            # Keep the ticket partition key in sync with the flight
+            self.tickets.exclude(flight_departure=self.departure_time).update(
+                flight_departure=self.departure_time
+            )
+            if self.get_status_values() != getattr(self, "_saved_status", None):
+                FlightStatusChange.objects.create(
+                    flight=self,
+                    status=self.status,
+                    delay_minutes=self.delay_minutes,
+                    departure_time=self.departure_time,
+                )
+        self._saved_status = self.get_status_values()
+        self._saved_search = self.get_search_values()
+        if relisted:
+            transaction.on_commit(search_cache.schedule_changed)
+        else:
+            flight_id = self.id
+            transaction.on_commit(lambda: search_cache.flights_changed([flight_id]))
+
+
+class FlightStatusChange(models.Model):
+    """
+    Append-only log of flight status, delay and departure changes,
+    read by the flight status stream
+    """
+
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="status_changes",
+    )
+    status = models.CharField(max_length=16, choices=Flight.Status.choices)
+    delay_minutes = models.PositiveIntegerField()
+    departure_time = models.DateTimeField()
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.flight_id}: {self.status} ({self.changed_at})"
+
 
 class Ticket(models.Model):
     row = models.IntegerField()
@@ -143,8 +464,12 @@ class Ticket(models.Model):
     order = models.ForeignKey(
         "Order",
         on_delete=models.CASCADE,
+        # Covered by airport_ticket_order_flight
+        db_index=False,
         related_name="tickets",
     )
+    # Copy of flight.departure_time, the ticket table is partitioned by it
+    flight_departure = models.DateTimeField(editable=False)
 
     @staticmethod
     def validate_ticket(row, seat, airplane, error_to_raise):
@@ -164,11 +489,22 @@ class Ticket(models.Model):
                     }
                 )
 
+    def get_flight(self):
+        """
+        The ticket's flight with its airplane. Uses the instances already
+        loaded, otherwise fetches both with one query.
+        """
+        if not Ticket.flight.is_cached(self):
+            self.flight = Flight.objects.select_related("airplane").get(
+                pk=self.flight_id
+            )
+        return self.flight
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
             self.seat,
-            self.flight.airplane,
+            self.get_flight().airplane,
             ValueError,
         )
 
@@ -178,15 +514,56 @@ class Ticket(models.Model):
         force_update=False,
         using=None,
         update_fields=None,
+        validate=True,
+        touch=True,
     ):
-        self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        """
+        Checks the seat against the airplane unless `validate` is False,
+        for callers that validated it already. Taken seats are left to
+        the unique constraint and reported as a ValidationError. The
+        flight is marked as changed unless `touch` is False, for callers
+        that touch the flights of many tickets at once.
+        """
+        if validate:
+            self.clean()
+        if self.flight_departure is None:
+            self.flight_departure = self.get_flight().departure_time
+        try:
+            super(Ticket, self).save(force_insert, force_update, using, update_fields)
+        except IntegrityError as error:
+            if not is_unique_violation(error):
+                raise
+            raise ValidationError(
+                {
+                    NON_FIELD_ERRORS: [
+                        self.unique_error_message(Ticket, ("flight", "row", "seat"))
+                    ]
+                }
+            ) from error
+        flight_id = self.flight_id
+        if touch:
+            Flight.objects.filter(pk=flight_id).touch()
+        transaction.on_commit(lambda: search_cache.flights_changed([flight_id]))
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        flight_id = self.flight_id
+        Flight.objects.filter(pk=flight_id).touch()
+        transaction.on_commit(lambda: search_cache.flights_changed([flight_id]))
+        return result
 
     class Meta:
         unique_together = ["flight", "row", "seat"]
         ordering = ["row", "seat"]
+        indexes = [
+            # Tickets of orders and their flights, read from the index alone
+            # on PostgreSQL
+            models.Index(
+                fields=["order", "flight"],
+                include=["id", "flight_departure", "row", "seat"],
+                name="airport_ticket_order_flight",
+            ),
+        ]
 
     def __str__(self):
         return f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
@@ -194,10 +571,91 @@ class Ticket(models.Model):
 
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        # Covered by airport_order_user_created
+        db_index=False,
+    )
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Order history and trip summaries of a user
+            models.Index(
+                fields=["user", "-created_at"], name="airport_order_user_created"
+            ),
+        ]
 
     def __str__(self):
         return f"Order: {self.id} created: {self.created_at}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.changed()
+
+    def delete(self, *args, **kwargs):
+        # Seats of the order's tickets are freed
+        flight_ids = set(self.tickets.values_list("flight_id", flat=True))
+        Flight.objects.filter(pk__in=flight_ids).touch()
+        result = super().delete(*args, **kwargs)
+        self.changed()
+        transaction.on_commit(lambda: search_cache.flights_changed(flight_ids))
+        return result
+
+    def changed(self):
+        """Drops the cached trip summary of the user once committed"""
+        from airport import trips
+
+        user_id = self.user_id
+        transaction.on_commit(lambda: trips.orders_changed(user_id))
+
+
+class FlightArchive(models.Model):
+    """Read-only detail snapshot of a departed flight moved out of Flight"""
+
+    id = models.BigIntegerField(primary_key=True)
+    departure_time = models.DateTimeField()
+    data = models.JSONField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-departure_time"]
+
+    def __str__(self):
+        return f"Archived flight: {self.id} departed: {self.departure_time}"
+
+
+class OrderArchive(models.Model):
+    """Read-only snapshot of an order whose flights were all archived"""
+
+    id = models.BigIntegerField(primary_key=True)
+    created_at = models.DateTimeField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    data = models.JSONField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Archived order: {self.id} created: {self.created_at}"
+
+
+class RateCounter(models.Model):
+    """
+    Request counters of a rate throttle client in its current and
+    previous window, updated by SlidingWindowRateThrottle
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    period = models.BigIntegerField()
+    current = models.PositiveIntegerField(default=0)
+    previous = models.PositiveIntegerField(default=0)
+    # Whether the latest request was let through
+    allowed = models.BooleanField(default=True)
+    # Unix time after which both windows are over
+    expires = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.current} ({self.previous})"
@@ -0,0 +1,131 @@
+"""
+Helpers managing the monthly partitions of the PostgreSQL ticket table.
+
+`airport_ticket` is range partitioned by `flight_departure` (see
+migration 0007). Tickets without a matching monthly partition land
+in `airport_ticket_default`, creating a partition moves them out.
+"""
+
+from datetime import datetime, timezone
+
+TABLE = "airport_ticket"
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def month_start(value):
+    """First instant of the month of `value` in UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(connection):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(connection):
+    """Returns {month: table name} of the attached monthly partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        suffix = name[len(TABLE) + 1 :]
+        if len(suffix) == 8 and suffix[0] == "y" and suffix[5] == "m":
+            month = datetime(
+                int(suffix[1:5]), int(suffix[6:8]), 1, tzinfo=timezone.utc
+            )
+            partitions[month] = name
+    return partitions
+
+
+def default_partition_months(connection):
+    """Months of the tickets currently stored in the default partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', flight_departure AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+        return sorted(
+            month.replace(tzinfo=timezone.utc) for (month,) in cursor.fetchall()
+        )
+
+
+def create_partition(connection, month):
+    """
+    Creates the partition of `month`, moving its tickets out of the
+    default partition. Attaching scans the new table to validate its
+    bounds and the default partition, locked meanwhile, to check that
+    none of its rows belong to the month.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    # DDL does not accept parameters, bounds are formatted datetimes
+    lower = month.isoformat()
+    upper = add_months(month, 1).isoformat()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name} "
+            f"(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE flight_departure >= %s AND flight_departure < %s "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+            [month, add_months(month, 1)],
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    return name
+
+
+def detach_partition(connection, month, archive_schema=None, drop=False):
+    """
+    Detaches the partition of `month` from the ticket table and
+    either drops it or moves it to `archive_schema`.
+    """
+    name = partition_name(month_start(month))
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        if drop:
+            cursor.execute(f"DROP TABLE {name}")
+            return name
+
+        # Archived tickets must not block deleting their flights and orders
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [name],
+        )
+        for (constraint,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"')
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
+    return name
@@ -0,0 +1,70 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson when it is installed.
+
+    Output matches the compact DRF JSONRenderer, except that NaN and
+    infinite floats are written as null where JSONRenderer raises
+    ValueError. Indented rendering (browsable API, `; indent=` media
+    type parameter), ASCII-only output and a missing orjson fall back
+    to the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Keep the output a strict javascript subset like JSONRenderer
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accepts `text/event-stream` requests. Event streams are returned as
+    StreamingHttpResponse and skip rendering, only errors are rendered
+    here, as a single "error" event.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.format_event(data, event="error")
+
+    @staticmethod
+    def format_event(data, event=None, event_id=None):
+        """One server-sent event with `data` encoded as JSON"""
+        lines = []
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        if event is not None:
+            lines.append(f"event: {event}")
+        lines.append("data: " + json.dumps(data, cls=DjangoJSONEncoder))
+        return "\n".join(lines) + "\n\n"
@@ -0,0 +1,100 @@
+"""
+Departures of flight schedules that are not saved as flights yet.
+
+A FlightSchedule departure is listed by the flight search as an unsaved
+Flight built on the fly, with a key "s<schedule id>-<YYYYMMDD>" instead
+of an id. Orders may use the key in place of a flight id; the first
+booking saves the departure as a Flight with the schedule's crew, so
+schedules never fill the flight table in advance.
+"""
+import datetime
+import re
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from airport.models import Flight, FlightSchedule
+
+DEPARTURE_KEY = re.compile(r"^s(\d+)-(\d{8})$")
+
+
+def departure_key(flight):
+    """Key of an unsaved flight built by FlightSchedule.build_flight()"""
+    return f"s{flight.schedule_id}-{flight.schedule_date:%Y%m%d}"
+
+
+def scheduled_flights(date, airplanes=None, source=None, destination=None):
+    """
+    Unsaved flights of schedules departing on `date` in the future that
+    have no saved flight yet, built from one query
+    """
+    schedules = (
+        FlightSchedule.objects.filter(
+            valid_from__lte=date,
+            valid_until__gte=date,
+            weekdays__contains=str(date.isoweekday()),
+        )
+        .exclude(flights__schedule_date=date)
+        .select_related("route__source", "route__destination", "airplane")
+    )
+    if airplanes is not None:
+        schedules = schedules.filter(airplane_id__in=airplanes)
+    if source is not None:
+        schedules = schedules.filter(route__source_id__in=source)
+    if destination is not None:
+        schedules = schedules.filter(route__destination_id__in=destination)
+
+    now = timezone.now()
+    flights = [schedule.build_flight(date) for schedule in schedules]
+    return [flight for flight in flights if flight.departure_time > now]
+
+
+def resolve_departure(key):
+    """
+    Flight of a departure key: the saved one when its first ticket
+    was sold, otherwise an unsaved one. None for unknown, past or
+    malformed keys.
+    """
+    match = DEPARTURE_KEY.match(key)
+    if match is None:
+        return None
+    try:
+        date = datetime.datetime.strptime(match[2], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+    schedule = (
+        FlightSchedule.objects.select_related("route", "airplane")
+        .filter(pk=match[1])
+        .first()
+    )
+    if schedule is None or not schedule.runs_on(date):
+        return None
+
+    saved = (
+        Flight.objects.select_related("airplane")
+        .filter(schedule=schedule, schedule_date=date)
+        .first()
+    )
+    if saved is not None:
+        return saved
+    flight = schedule.build_flight(date)
+    if flight.departure_time <= timezone.now():
+        return None
+    return flight
+
+
+def materialize(flight):
+    """
+    Saves an unsaved scheduled flight with the schedule's crew, or
+    returns the flight saved for the same departure by another booking
+    """
+    try:
+        with transaction.atomic():
+            flight.save()
+            flight.crew.set(flight.schedule.crew.all())
+    except IntegrityError:
+        return Flight.objects.select_related("airplane").get(
+            schedule=flight.schedule_id, schedule_date=flight.schedule_date
+        )
+    return flight
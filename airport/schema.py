@@ -0,0 +1,27 @@
+"""
+OpenAPI schema helpers for views.
+
+drf_spectacular is imported only when its app is installed,
+API-only workers get no-op stand-ins instead.
+"""
+
+from django.conf import settings
+
+if "drf_spectacular" in settings.INSTALLED_APPS:
+    from drf_spectacular.types import OpenApiTypes
+    from drf_spectacular.utils import extend_schema, OpenApiParameter
+else:
+
+    class OpenApiTypes:
+        DATE = "date"
+        INT = "int"
+        FLOAT = "float"
+
+    def OpenApiParameter(*args, **kwargs):
+        return None
+
+    def extend_schema(*args, **kwargs):
+        return lambda view: view
+
+
+__all__ = ["OpenApiTypes", "OpenApiParameter", "extend_schema"]
@@ -0,0 +1,56 @@
+"""
+Short lived cache of flight search results.
+
+Entries hold the ordered (flight id, tickets available) pairs of a
+search, keyed by its normalized filter parameters. Instead of deleting
+entries, changes leave timestamps: selling or cancelling a ticket and
+editing a flight stamp the flight; creating a flight or changing its
+route, airplane or departure stamps the whole schedule. An entry is
+used only when none of the flights it is about to show nor the
+schedule changed after it was stored.
+"""
+import hashlib
+import time
+
+from django.core.cache import caches
+
+SCHEDULE_KEY = "flight_search:schedule"
+
+
+def get_cache():
+    return caches["search"]
+
+
+def search_key(params):
+    """Cache key of normalized search parameters"""
+    canonical = repr(sorted(params.items()))
+    return "flight_search:" + hashlib.md5(canonical.encode()).hexdigest()
+
+
+def flight_key(flight_id):
+    return f"flight_search:flight:{flight_id}"
+
+
+def get_results(key):
+    """Returns (stored_at, [(flight id, tickets available), ...]) or None"""
+    return get_cache().get(key)
+
+
+def set_results(key, results):
+    get_cache().set(key, (time.time(), results))
+
+
+def is_fresh(stored_at, flight_ids):
+    stamps = get_cache().get_many([SCHEDULE_KEY, *map(flight_key, flight_ids)])
+    return all(stamp < stored_at for stamp in stamps.values())
+
+
+def flights_changed(flight_ids):
+    """Marks results showing these flights as stale"""
+    now = time.time()
+    get_cache().set_many({flight_key(flight_id): now for flight_id in flight_ids})
+
+
+def schedule_changed():
+    """Marks every result as stale, e.g. when flights are added"""
+    get_cache().set(SCHEDULE_KEY, time.time())
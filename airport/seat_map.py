@@ -0,0 +1,174 @@
+"""
+Seat maps of many flights as one NumPy array.
+
+`SeatMaps.load()` reads the airplane layout and the sold (row, seat)
+pairs of all given flights with two queries and marks them in a boolean
+array shaped (flights, rows, seats_in_row), padded to the largest
+airplane. Availability, load factors, row fill and adjacent seat
+searches are then computed for all flights at once.
+"""
+import numpy as np
+
+from airport.models import Flight, Ticket
+
+
+class SeatMaps:
+    def __init__(self, flight_ids, rows, seats_in_row, tickets):
+        """
+        `rows` and `seats_in_row` are the airplane sizes of `flight_ids`,
+        `tickets` is an (n, 3) array of sold (flight id, row, seat).
+        """
+        self.flight_ids = np.asarray(flight_ids, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.seats_in_row = np.asarray(seats_in_row, dtype=np.int64)
+        self.positions = {
+            flight_id: position for position, flight_id in enumerate(flight_ids)
+        }
+
+        shape = (
+            len(self.flight_ids),
+            int(self.rows.max(initial=0)),
+            int(self.seats_in_row.max(initial=0)),
+        )
+        # Seats that exist on each flight's airplane
+        self.valid = (
+            np.arange(shape[1])[None, :, None] < self.rows[:, None, None]
+        ) & (np.arange(shape[2])[None, None, :] < self.seats_in_row[:, None, None])
+
+        self.taken = np.zeros(shape, dtype=bool)
+        tickets = np.asarray(tickets, dtype=np.int64).reshape(-1, 3)
+        if len(tickets):
+            order = np.argsort(self.flight_ids)
+            flight_positions = order[
+                np.searchsorted(self.flight_ids, tickets[:, 0], sorter=order)
+            ]
+            rows, seats = tickets[:, 1], tickets[:, 2]
+            # Tickets of seats the airplane no longer has, e.g. after its
+            # rows were reduced, are left out
+            inside = (
+                (rows >= 1)
+                & (rows <= self.rows[flight_positions])
+                & (seats >= 1)
+                & (seats <= self.seats_in_row[flight_positions])
+            )
+            self.taken[
+                flight_positions[inside], rows[inside] - 1, seats[inside] - 1
+            ] = True
+
+    @classmethod
+    def load(cls, flights):
+        """Builds seat maps of a Flight queryset with two queries"""
+        layout = list(
+            flights.order_by("id").values_list(
+                "id", "departure_time", "airplane__rows", "airplane__seats_in_row"
+            )
+        )
+        flight_ids = [flight_id for flight_id, *_ in layout]
+        tickets = Ticket.objects.filter(
+            flight_id__in=flight_ids,
+            # Lets PostgreSQL skip ticket partitions of other months
+            flight_departure__in={departure for _, departure, *_ in layout},
+        ).values_list("flight_id", "row", "seat")
+
+        return cls(
+            flight_ids,
+            [rows for *_, rows, _ in layout],
+            [seats for *_, seats in layout],
+            np.fromiter(
+                (value for ticket in tickets.iterator() for value in ticket),
+                dtype=np.int64,
+            ),
+        )
+
+    @classmethod
+    def for_flight(cls, flight_id):
+        return cls.load(Flight.objects.filter(id=flight_id))
+
+    @property
+    def free(self):
+        return self.valid & ~self.taken
+
+    def capacity(self):
+        return self.rows * self.seats_in_row
+
+    def sold(self):
+        return self.taken.sum(axis=(1, 2))
+
+    def available(self):
+        return self.free.sum(axis=(1, 2))
+
+    def load_factors(self):
+        """Share of sold seats per flight, 0 for airplanes without seats"""
+        capacity = self.capacity()
+        return np.divide(
+            self.sold(),
+            capacity,
+            out=np.zeros(len(capacity), dtype=float),
+            where=capacity > 0,
+        )
+
+    def row_fill(self):
+        """Share of sold seats per row, NaN for rows the airplane lacks"""
+        fill = self.taken.sum(axis=2) / np.maximum(self.seats_in_row, 1)[:, None]
+        fill[~self.valid.any(axis=2)] = np.nan
+        return fill
+
+    def adjacent_blocks(self, count):
+        """
+        Boolean array (flights, rows, first seats) marking where
+        `count` free seats next to each other in one row begin.
+        """
+        if count < 1 or count > self.taken.shape[2]:
+            return np.zeros(self.taken.shape[:2] + (0,), dtype=bool)
+
+        free = np.pad(self.free.astype(np.int32), ((0, 0), (0, 0), (1, 0)))
+        runs = np.cumsum(free, axis=2)
+        return runs[:, :, count:] - runs[:, :, :-count] == count
+
+    def find_adjacent(self, flight_id, count):
+        """(row, first seat) of every block of `count` free seats, 1-based"""
+        blocks = self.adjacent_blocks(count)[self.positions[flight_id]]
+        return [(int(row) + 1, int(seat) + 1) for row, seat in np.argwhere(blocks)]
+
+    def choose_seats(
+        self, flight_id, count, together=True, window=False, front=False
+    ):
+        """
+        Picks `count` free seats of a flight as 1-based (row, seat) pairs,
+        or returns None when fewer seats are free. Preferences:
+
+        - `together`: one block of adjacent seats in a row when there is
+          one, otherwise seats in the emptiest rows first;
+        - `window`: blocks or seats next to a window come first;
+        - `front`: lower row numbers win over the other row choices.
+        """
+        position = self.positions[flight_id]
+        free = self.free[position]
+        if count < 1 or free.sum() < count:
+            return None
+
+        seats_in_row = int(self.seats_in_row[position])
+        row_free = free.sum(axis=1)
+
+        if together:
+            blocks = np.argwhere(self.adjacent_blocks(count)[position])
+            if len(blocks):
+                rows, starts = blocks[:, 0], blocks[:, 1]
+                # np.lexsort sorts by the last key first
+                keys = [starts, rows]
+                if not front:
+                    keys.append(-row_free[rows])
+                if window:
+                    keys.append((starts != 0) & (starts + count != seats_in_row))
+                row, start = blocks[np.lexsort(keys)[0]]
+                return [(int(row) + 1, int(start) + seat + 1) for seat in range(count)]
+
+        seats = np.argwhere(free)
+        rows, columns = seats[:, 0], seats[:, 1]
+        keys = [columns, rows]
+        if together and not front:
+            keys.append(-row_free[rows])
+        if window:
+            keys.append((columns != 0) & (columns != seats_in_row - 1))
+        chosen = seats[np.lexsort(keys)[:count]]
+        return sorted((int(row) + 1, int(seat) + 1) for row, seat in chosen)
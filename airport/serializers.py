@@ -1,7 +1,12 @@
-from django.db import transaction
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.exceptions import ValidationError
 
+from airport.booking import SeatsUnavailable, lock_flights, taken_seats
 from airport.models import (
     Airport,
     Route,
@@ -9,20 +14,212 @@ from airport.models import (
     City,
     Crew,
     Flight,
+    FlightSchedule,
     Ticket,
     Order,
     AirplaneType,
     Airplane,
 )
+from airport.schedules import departure_key, materialize, resolve_departure
 
 
-class CountrySerializer(serializers.ModelSerializer):
+def params_to_names(query_string):
+    """Converts a comma separated string of field names to a set"""
+    if query_string is None:
+        return None
+    return {name.strip() for name in query_string.split(",") if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Prunes top level fields to the ones listed in `?fields=`.
+    When `?expand=` is given, nested serializers not listed in it
+    are rendered as primary keys instead of full objects.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        if request is None or request.method != "GET" or not self.is_top_level():
+            return fields
+
+        requested = params_to_names(request.query_params.get("fields"))
+        expanded = params_to_names(request.query_params.get("expand"))
+
+        if requested is not None:
+            fields = {
+                name: field for name, field in fields.items() if name in requested
+            }
+
+        if expanded is not None:
+            for name, field in fields.items():
+                if isinstance(field, serializers.BaseSerializer) and (
+                    name not in expanded
+                ):
+                    fields[name] = self.collapse_field(field)
+
+        return fields
+
+    def is_top_level(self):
+        return self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer)
+            and self.parent.parent is None
+        )
+
+    @staticmethod
+    def collapse_field(field):
+        kwargs = {
+            "read_only": True,
+            "many": isinstance(field, serializers.ListSerializer),
+        }
+        if field.source:
+            kwargs["source"] = field.source
+        return PrimaryKeyRelatedField(**kwargs)
+
+
+class PreloadedRelatedField(PrimaryKeyRelatedField):
+    """
+    Primary key field that looks related objects up in `preloaded`
+    (pk -> object) when it is set, instead of one query per value.
+    BulkListSerializer preloads the objects of all items at once.
+    """
+
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in self.preloaded:
+            self.fail("does_not_exist", pk_value=data)
+        return self.preloaded[pk]
+
+
+class BulkSerializerMixin:
+    """
+    Model serializers that BulkListSerializer can write many of at
+    once. Model save() is not called for them, the hooks stand in for
+    its side effects.
+    """
+
+    serializer_related_field = PreloadedRelatedField
+
+    def bulk_prepare(self, objects, fields=None):
+        """
+        Called before the objects are written. `fields` is the set of
+        fields to update, None when the objects are created.
+        """
+
+    def bulk_saved(self, objects):
+        """Called after the objects are written"""
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates many items with one query per related field and writes
+    them with bulk_create(), or with bulk_update() when `instance` is a
+    queryset of the objects to update, identified by the "id" of each
+    item. Errors are reported per item, nothing is written unless all
+    items are valid.
+    """
+
+    batch_size = 1000
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.preload(data)
+        self.objects = []
+        self.updated = set()
+        return super().to_internal_value(data)
+
+    def preload(self, data):
+        items = [item for item in data if isinstance(item, dict)]
+        if self.instance is not None:
+            self.instances = self.instance.in_bulk(
+                self.item_pks(self.child.Meta.model, items, "id")
+            )
+
+        for name, field in self.child.fields.items():
+            if isinstance(field, PreloadedRelatedField) and not field.read_only:
+                queryset = field.get_queryset()
+                field.preloaded = queryset.in_bulk(
+                    self.item_pks(queryset.model, items, name)
+                )
+
+    @staticmethod
+    def item_pks(model, items, name):
+        pks = set()
+        for item in items:
+            try:
+                pks.add(model._meta.pk.to_python(item.get(name)))
+            except DjangoValidationError:
+                pass
+        pks.discard(None)
+        return pks
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            try:
+                pk = self.child.Meta.model._meta.pk.to_python(data.get("id"))
+            except (AttributeError, DjangoValidationError):
+                pk = None
+            instance = self.instances.get(pk)
+            if instance is None:
+                raise ValidationError({"id": ["Object with this id does not exist."]})
+            if pk in self.updated:
+                raise ValidationError({"id": ["Object is updated more than once."]})
+            self.updated.add(pk)
+            self.child.instance = instance
+            self.objects.append(instance)
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objects = [model(**attrs) for attrs in validated_data]
+        self.child.bulk_prepare(objects)
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.child.bulk_saved(objects)
+        return objects
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        fields = set()
+        for obj, attrs in zip(self.objects, validated_data):
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            fields.update(attrs)
+        self.child.bulk_prepare(self.objects, fields)
+        if fields:
+            # bulk_update() leaves auto_now fields alone
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    for obj in self.objects:
+                        field.pre_save(obj, add=False)
+                    fields.add(field.name)
+            model.objects.bulk_update(
+                self.objects, sorted(fields), batch_size=self.batch_size
+            )
+        self.child.bulk_saved(self.objects)
+        return self.objects
+
+
+class CountrySerializer(
+    SparseFieldsMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Country
         fields = ("id", "name")
 
 
-class CitySerializer(serializers.ModelSerializer):
+class CitySerializer(
+    SparseFieldsMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = City
         fields = ("id", "name", "country")
@@ -40,10 +237,23 @@ class CityDetailSerializer(CitySerializer):
     country = CountrySerializer(read_only=True)
 
 
-class AirportSerializer(serializers.ModelSerializer):
+class AirportSerializer(
+    SparseFieldsMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Airport
-        fields = ("id", "name", "closest_big_city")
+        fields = ("id", "name", "closest_big_city", "latitude", "longitude")
+
+    def bulk_saved(self, objects):
+        moved = []
+        for airport in objects:
+            if airport.get_coordinates() != getattr(
+                airport, "_saved_coordinates", (None, None)
+            ):
+                moved.append(airport)
+            airport._saved_coordinates = airport.get_coordinates()
+        if moved:
+            Airport.coordinates_changed(moved)
 
 
 class AirportListSerializer(AirportSerializer):
@@ -56,13 +266,13 @@ class AirportDetailSerializer(AirportSerializer):
     closest_big_city = CityDetailSerializer()
 
 
-class AirplaneTypeSerializer(serializers.ModelSerializer):
+class AirplaneTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AirplaneType
         fields = ("id", "name")
 
 
-class AirplaneSerializer(serializers.ModelSerializer):
+class AirplaneSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Airplane
         fields = (
@@ -94,18 +304,28 @@ class AirplaneImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(
+    SparseFieldsMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
 
     class Meta:
         model = Crew
         fields = ("id", "first_name", "last_name")
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(
+    SparseFieldsMixin, BulkSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
 
+    def bulk_prepare(self, objects, fields=None):
+        for route in objects:
+            route.set_distance()
+        if fields is not None:
+            fields.add("distance")
+
 
 class RoutListSerializer(RouteSerializer):
     source = serializers.SlugRelatedField(
@@ -119,7 +339,7 @@ class RoutListSerializer(RouteSerializer):
 
     class Meta:
         model = Route
-        fields = ("id", "source", "destination")
+        fields = ("id", "source", "destination", "distance")
 
 
 class RoutDetailSerializer(RouteSerializer):
@@ -137,7 +357,25 @@ class RoutDetailSerializer(RouteSerializer):
         fields = ("id", "source", "destination", "distance")
 
 
+class FlightReferenceField(PrimaryKeyRelatedField):
+    """
+    Flight id, or the key of a scheduled departure listed by the
+    flight search ("s<schedule id>-<YYYYMMDD>"). Departures without
+    a saved flight resolve to an unsaved Flight, see `materialize()`.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) and data.startswith("s"):
+            flight = resolve_departure(data)
+            if flight is None:
+                self.fail("does_not_exist", pk_value=data)
+            return flight
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    # validate() checks the seat against the airplane loaded here
+    flight = FlightReferenceField(queryset=Flight.objects.select_related("airplane"))
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
@@ -149,6 +387,10 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight", "order")
+        # Tickets are always created through their order
+        read_only_fields = ("order",)
+        # Sold seats are checked under the flight lock when booking
+        validators = []
 
 
 class TicketSeatSerializer(TicketSerializer):
@@ -157,13 +399,48 @@ class TicketSeatSerializer(TicketSerializer):
         fields = ("row", "seat")
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Flight
-        fields = ("id", "route", "airplane", "departure_time", "arrival_time", "crew")
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "departure_time",
+            "arrival_time",
+            "crew",
+            "status",
+            "delay_minutes",
+        )
 
 
-class FlightListSerializer(serializers.ModelSerializer):
+class FlightScheduleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlightSchedule
+        fields = (
+            "id",
+            "route",
+            "airplane",
+            "weekdays",
+            "departure",
+            "duration",
+            "valid_from",
+            "valid_until",
+            "crew",
+        )
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        valid_from = data.get("valid_from", getattr(self.instance, "valid_from", None))
+        valid_until = data.get(
+            "valid_until", getattr(self.instance, "valid_until", None)
+        )
+        if valid_from and valid_until and valid_from > valid_until:
+            raise ValidationError({"valid_until": "must not be before valid_from"})
+        return data
+
+
+class FlightListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     rout_source = serializers.CharField(
         source="route.source.name",
         read_only=True,
@@ -193,6 +470,130 @@ class FlightListSerializer(serializers.ModelSerializer):
         )
 
 
+class FlightListValuesSerializer:
+    """
+    Fast path for FlightListSerializer used by the flight list.
+    Fetches only the needed columns with `values_list()` and builds
+    the same output with precompiled formatters instead of running
+    DRF field machinery for every row.
+    """
+
+    columns = {
+        "id": "id",
+        "rout_source": "route__source__name",
+        "rout_destination": "route__destination__name",
+        "airplane": "airplane__name",
+        "departure_time": "departure_time",
+        "arrival_time": "arrival_time",
+        "tickets_available": "tickets_available",
+    }
+    datetime_fields = ("departure_time", "arrival_time")
+    datetime_format = "%Y-%m-%d %H:%M"
+
+    def __init__(self, fields=None):
+        self.field_names = [
+            name
+            for name in FlightListSerializer.Meta.fields
+            if fields is None or name in fields
+        ]
+        self.datetime_positions = [
+            position
+            for position, name in enumerate(self.field_names)
+            if name in self.datetime_fields
+        ]
+        self.format_datetime = self.get_datetime_formatter()
+
+    def get_datetime_formatter(self):
+        """Mirrors DRF DateTimeField timezone handling and formatting"""
+        output_format = self.datetime_format
+        field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def format_datetime(value):
+            if field_timezone is not None and timezone.is_aware(value):
+                value = value.astimezone(field_timezone)
+            return value.strftime(output_format)
+
+        return format_datetime
+
+    def get_rows(self, queryset):
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values_list(*(self.columns[name] for name in self.field_names))
+        )
+
+    def get_rows_by_id(self, queryset, results):
+        """
+        Rows for (id, tickets_available) pairs of a cached search in
+        their order, fetched by primary key without recounting tickets
+        """
+        names = [name for name in self.field_names if name != "tickets_available"]
+        fetched = {
+            row[0]: row[1:]
+            for row in queryset.select_related(None)
+            .prefetch_related(None)
+            .filter(pk__in=[flight_id for flight_id, _ in results])
+            .order_by()
+            .values_list("id", *(self.columns[name] for name in names))
+        }
+
+        rows = []
+        for flight_id, tickets_available in results:
+            values = fetched.get(flight_id)
+            if values is None:
+                # Deleted after the search was cached
+                continue
+            row = dict(zip(names, values), tickets_available=tickets_available)
+            rows.append(tuple(row[name] for name in self.field_names))
+        return rows
+
+    def get_rows_with_scheduled(self, queryset, flights):
+        """
+        Rows of the queryset merged with unsaved scheduled flights, which
+        show their departure key as id, latest departure first
+        """
+        rows = [
+            (row[0], row[1:])
+            for row in queryset.select_related(None)
+            .prefetch_related(None)
+            .values_list(
+                "departure_time", *(self.columns[name] for name in self.field_names)
+            )
+        ]
+        for flight in flights:
+            values = {
+                "id": departure_key(flight),
+                "rout_source": flight.route.source.name,
+                "rout_destination": flight.route.destination.name,
+                "airplane": flight.airplane.name,
+                "departure_time": flight.departure_time,
+                "arrival_time": flight.arrival_time,
+                "tickets_available": flight.airplane.capacity,
+            }
+            rows.append(
+                (
+                    flight.departure_time,
+                    tuple(values[name] for name in self.field_names),
+                )
+            )
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return [row for _, row in rows]
+
+    def to_representation(self, rows):
+        field_names = self.field_names
+        datetime_positions = self.datetime_positions
+        format_datetime = self.format_datetime
+
+        data = []
+        for row in rows:
+            if datetime_positions:
+                row = list(row)
+                for position in datetime_positions:
+                    row[position] = format_datetime(row[position])
+            data.append(dict(zip(field_names, row)))
+        return data
+
+
 class FlightDetailSerializer(FlightSerializer):
     route = RoutDetailSerializer(many=False, read_only=True)
     airplane = AirplaneListSerializer(many=False, read_only=True)
@@ -219,6 +620,8 @@ class FlightDetailSerializer(FlightSerializer):
             "departure_time",
             "arrival_time",
             "crew",
+            "status",
+            "delay_minutes",
             "taken_tickets",
             "airplane_image",
         )
@@ -228,7 +631,7 @@ class TicketListSerializer(TicketSerializer):
     flight = FlightListSerializer(many=False, read_only=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
@@ -236,14 +639,112 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ("id", "tickets", "created_at")
 
     def create(self, validated_data):
+        tickets_data = validated_data.pop("tickets")
         with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
+            # Scheduled departures become flights with their first ticket
+            materialized = {}
             for ticket_data in tickets_data:
-                ticket_data["order"] = order
-                Ticket.objects.create(**ticket_data)
-            return order
+                flight = ticket_data["flight"]
+                if flight.pk is None:
+                    key = departure_key(flight)
+                    if key not in materialized:
+                        materialized[key] = materialize(flight)
+                    ticket_data["flight"] = materialized[key]
+            return self.create_tickets(validated_data, tickets_data)
+
+    def create_tickets(self, validated_data, tickets_data):
+        seats = [
+            (ticket_data["flight"].id, ticket_data["row"], ticket_data["seat"])
+            for ticket_data in tickets_data
+        ]
+        try:
+            with transaction.atomic():
+                flights = lock_flights({flight_id for flight_id, _, _ in seats})
+                # Deleted or archived since the tickets were validated
+                missing = {flight_id for flight_id, _, _ in seats} - flights.keys()
+                if missing:
+                    raise ValidationError(
+                        {
+                            "tickets": [
+                                f"Flight {flight_id} is no longer available."
+                                for flight_id in sorted(missing)
+                            ]
+                        }
+                    )
+                taken = taken_seats(seats, flights)
+                if taken:
+                    raise SeatsUnavailable(taken)
+
+                order = Order.objects.create(**validated_data)
+                for ticket_data in tickets_data:
+                    ticket_data["order"] = order
+                    ticket_data["flight"] = flights[ticket_data["flight"].id]
+                    # Seats were checked against the airplane in validate()
+                    Ticket(**ticket_data).save(
+                        force_insert=True, validate=False, touch=False
+                    )
+                Flight.objects.filter(pk__in=flights).touch()
+                return order
+        except (IntegrityError, DjangoValidationError):
+            # Tickets written without the flight lock, e.g. in the admin
+            taken = taken_seats(seats, flights)
+            if not taken:
+                raise
+            raise SeatsUnavailable(taken)
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=False)
+
+
+class SeatRequestSerializer(serializers.Serializer):
+    """Asks for `count` seats on a flight, picked by the server"""
+
+    flight = FlightReferenceField(queryset=Flight.objects.select_related("airplane"))
+    count = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(default=True)
+    window = serializers.BooleanField(default=False)
+    front = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        airplane = attrs["flight"].airplane
+        if attrs["count"] > airplane.rows * airplane.seats_in_row:
+            raise ValidationError({"count": "count exceeds the airplane capacity"})
+        return attrs
+
+    def choose_seats(self, flight):
+        # NumPy is imported on first use to keep worker startup fast
+        from airport.seat_map import SeatMaps
+
+        seats = SeatMaps.for_flight(flight.id).choose_seats(
+            flight.id,
+            self.validated_data["count"],
+            together=self.validated_data["together"],
+            window=self.validated_data["window"],
+            front=self.validated_data["front"],
+        )
+        if seats is None:
+            raise ValidationError({"count": "Not enough free seats on this flight"})
+        return seats
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            if validated_data["flight"].pk is None:
+                validated_data["flight"] = materialize(validated_data["flight"])
+            # Bookers of the same flight wait here, so the seats picked
+            # below cannot be taken before the tickets are saved
+            flight_id = validated_data["flight"].pk
+            flight = lock_flights([flight_id]).get(flight_id)
+            if flight is None:
+                raise ValidationError({"flight": "This flight is no longer available."})
+            seats = self.choose_seats(flight)
+            order = Order.objects.create(user_id=validated_data["user_id"])
+            for row, seat in seats:
+                Ticket(row=row, seat=seat, flight=flight, order=order).save(
+                    force_insert=True, validate=False, touch=False
+                )
+            Flight.objects.filter(pk=flight_id).touch()
+            return order
+
+    def to_representation(self, instance):
+        return OrderSerializer(instance, context=self.context).data
@@ -0,0 +1,112 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from airport.models import Airport, Crew, Flight, Order, Ticket
+from airport.tests.tests_flight_api import sample_flight
+
+
+class AdminChangeListTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@admin.test", "adminpassword"
+        )
+        self.client.force_login(self.admin)
+        self.order = Order.objects.create(user=self.admin)
+
+    def add_tickets(self, count):
+        for _ in range(count):
+            flight = sample_flight()
+            Ticket.objects.bulk_create(
+                Ticket(
+                    row=1,
+                    seat=seat,
+                    flight=flight,
+                    order=self.order,
+                    flight_departure=flight.departure_time,
+                )
+                for seat in range(1, 6)
+            )
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, 200)
+        return len(context.captured_queries)
+
+    def assert_constant_queries(self, url, **params):
+        self.add_tickets(2)
+        few = self.count_queries(url, **params)
+        self.add_tickets(20)
+        self.assertEqual(self.count_queries(url, **params), few)
+
+    def test_ticket_change_list(self):
+        self.assert_constant_queries(reverse("admin:airport_ticket_changelist"))
+
+    def test_flight_change_list(self):
+        self.assert_constant_queries(reverse("admin:airport_flight_changelist"))
+
+    def test_order_change_list(self):
+        self.assert_constant_queries(reverse("admin:airport_order_changelist"))
+
+    def test_change_lists_do_not_read_distinct_dates(self):
+        self.add_tickets(2)
+        for url in (
+            reverse("admin:airport_flight_changelist"),
+            reverse("admin:airport_order_changelist"),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            for query in context.captured_queries:
+                self.assertNotIn("DISTINCT", query["sql"])
+
+        res = self.client.get(
+            reverse("admin:airport_order_changelist"),
+            {"created_at__gte": "2000-01-01"},
+        )
+        self.assertEqual(res.context["cl"].result_list[0], self.order)
+
+    def test_ticket_search_by_id(self):
+        self.add_tickets(2)
+        flight_id = Ticket.objects.first().flight_id
+        url = reverse("admin:airport_ticket_changelist")
+
+        res = self.client.get(url, {"q": str(flight_id)})
+        found = res.context["cl"].result_list
+        self.assertTrue(set(Ticket.objects.filter(flight_id=flight_id)).issubset(found))
+        for ticket in found:
+            self.assertIn(flight_id, (ticket.id, ticket.order_id, ticket.flight_id))
+
+        res = self.client.get(url, {"q": "not an id"})
+        self.assertEqual(len(res.context["cl"].result_list), 0)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "requires PostgreSQL")
+class AdminIndexTests(TestCase):
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            # The tables are too small for the planner to prefer an index
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_name_searches_use_an_index(self):
+        for queryset, index in (
+            (Airport.objects.filter(name__istartswith="ab"), "airport_airport_name"),
+            (
+                Crew.objects.filter(last_name__istartswith="ab"),
+                "airport_crew_last_name",
+            ),
+        ):
+            self.assertIn(f"{index}_upper_like", self.explain(queryset))
+
+    def test_departure_filter_uses_an_index(self):
+        plan = self.explain(
+            Flight.objects.filter(departure_time__gte="2024-01-01T00:00Z")
+        )
+
+        self.assertIn("airport_flight_departure", plan)
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.archive import archive_orders, run_in_batches, snapshot_flights
+from airport.models import (
+    Crew,
+    Flight,
+    FlightArchive,
+    Order,
+    OrderArchive,
+    Ticket,
+)
+from airport.tests.tests_airplane_api import detail_flight_url
+from airport.tests.tests_flight_api import sample_flight
+
+
+def detail_order_url(order_id):
+    return reverse("airport:order-detail", args=(order_id,))
+
+
+class ArchiveFlightsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        self.old_flight = sample_flight(
+            departure_time=now - timedelta(days=100),
+            arrival_time=now - timedelta(days=100, hours=-2),
+        )
+        self.old_flight.crew.add(Crew.objects.create(first_name="A", last_name="B"))
+        self.new_flight = sample_flight(
+            departure_time=now + timedelta(days=1),
+            arrival_time=now + timedelta(days=1, hours=2),
+        )
+
+    def create_order(self, *flights):
+        order = Order.objects.create(user=self.user)
+        for seat, flight in enumerate(flights, start=1):
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+        return order
+
+    def archive(self):
+        call_command("archive_flights", "--days=30", stdout=StringIO())
+
+    def test_departed_flights_and_orders_are_moved(self):
+        old_order = self.create_order(self.old_flight)
+        new_order = self.create_order(self.new_flight)
+        expected = self.client.get(detail_flight_url(self.old_flight.id)).data
+
+        self.archive()
+
+        self.assertFalse(Flight.objects.filter(id=self.old_flight.id).exists())
+        self.assertTrue(Flight.objects.filter(id=self.new_flight.id).exists())
+        self.assertFalse(Order.objects.filter(id=old_order.id).exists())
+        self.assertTrue(Order.objects.filter(id=new_order.id).exists())
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(FlightArchive.objects.get().data, expected)
+        self.assertEqual(OrderArchive.objects.get().id, old_order.id)
+
+    def test_archived_flight_retrieve(self):
+        self.create_order(self.old_flight)
+        self.archive()
+
+        res = self.client.get(detail_flight_url(self.old_flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_tickets"], [{"row": 1, "seat": 1}])
+        self.assertEqual(len(res.data["crew"]), 1)
+
+        res = self.client.get(
+            detail_flight_url(self.old_flight.id), {"fields": "id,taken_tickets"}
+        )
+        self.assertEqual(set(res.data), {"id", "taken_tickets"})
+
+    def test_archived_order_retrieve_is_private(self):
+        order = self.create_order(self.old_flight)
+        self.archive()
+
+        res = self.client.get(detail_order_url(order.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["tickets"][0]["flight"], self.old_flight.id)
+
+        other = get_user_model().objects.create_user("other@test.com", "test1234")
+        self.client.force_authenticate(other)
+        res = self.client.get(detail_order_url(order.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_order_with_upcoming_flight_keeps_old_flight(self):
+        order = self.create_order(self.old_flight, self.new_flight)
+
+        self.archive()
+
+        self.assertTrue(Flight.objects.filter(id=self.old_flight.id).exists())
+        self.assertTrue(Order.objects.filter(id=order.id).exists())
+        self.assertEqual(order.tickets.count(), 2)
+
+    def test_archived_orders_run_the_order_hooks(self):
+        self.create_order(self.old_flight)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=2, seat=1, flight=self.old_flight, order=order)
+        updated_at = Flight.objects.get(id=self.old_flight.id).updated_at
+
+        with patch("airport.trips.orders_changed") as orders_changed, patch(
+            "airport.search_cache.flights_changed"
+        ) as flights_changed, self.captureOnCommitCallbacks(execute=True):
+            run_in_batches(snapshot_flights, timezone.now(), 10)
+            run_in_batches(archive_orders, 10)
+
+        orders_changed.assert_called_once_with(self.user.id)
+        flights_changed.assert_called_once_with({self.old_flight.id})
+        self.assertGreater(
+            Flight.objects.get(id=self.old_flight.id).updated_at, updated_at
+        )
+
+    def test_unknown_flight_is_not_found(self):
+        res = self.client.get(detail_flight_url(12345))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import FlightArchive, Order, Ticket
+from airport.tests.tests_airplane_api import sample_airplane
+from airport.tests.tests_flight_api import sample_airport, sample_flight, sample_route
+from airport.tests.tests_sparse_fields import model_queries
+
+
+def batch_url(basename):
+    return reverse(f"airport:{basename}-batch")
+
+
+class BatchRetrieveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client.force_authenticate(self.user)
+
+    def batch(self, basename, ids, **params):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(
+                batch_url(basename), {"ids": ",".join(map(str, ids)), **params}
+            )
+        return res, model_queries(context)
+
+    def test_auth_required(self):
+        res = APIClient().get(batch_url("flight"), {"ids": "1"})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_airports_in_the_order_of_the_ids(self):
+        airports = [sample_airport(name=f"Airport {i}") for i in range(3)]
+        ids = [airports[2].id, airports[0].id, 999, airports[2].id]
+
+        res, queries = self.batch("airport", ids)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [airport["id"] for airport in res.data], [airports[2].id, airports[0].id]
+        )
+        self.assertEqual(res.data[0]["closest_big_city"]["country"]["name"], "Country")
+
+    def test_airplanes_and_routes(self):
+        airplanes = [sample_airplane(name=f"Airplane {i}") for i in range(2)]
+        route = sample_route()
+
+        res, queries = self.batch("airplane", [airplane.id for airplane in airplanes])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(res.data[1]["airplane_type"]["name"], "Type_test")
+
+        res, queries = self.batch("route", [route.id])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(res.data[0]["source"], "Source Airport")
+
+    def test_flights_with_a_constant_number_of_queries(self):
+        flights = [sample_flight() for _ in range(5)]
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=2, flight=flights[3], order=order)
+
+        _, queries = self.batch("flight", [flights[0].id])
+        res, more_queries = self.batch("flight", [flight.id for flight in flights])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(more_queries), len(queries))
+        self.assertEqual(res.data[3]["taken_tickets"], [{"row": 1, "seat": 2}])
+        self.assertEqual(res.data[3]["route"]["destination"], "Destination Airport")
+
+    def test_sparse_fields(self):
+        flight = sample_flight()
+
+        res, queries = self.batch("flight", [flight.id], fields="id,departure_time")
+
+        self.assertEqual(list(res.data[0]), ["id", "departure_time"])
+        self.assertEqual(len(queries), 1)
+
+    def test_archived_flights(self):
+        flight = sample_flight()
+        archived = FlightArchive.objects.create(
+            id=flight.id + 1,
+            departure_time=flight.departure_time,
+            data={"id": flight.id + 1, "status": "departed"},
+        )
+
+        res, _ = self.batch("flight", [archived.id, flight.id])
+
+        self.assertEqual([item["id"] for item in res.data], [archived.id, flight.id])
+        self.assertEqual(res.data[0], archived.data)
+
+    def test_invalid_ids(self):
+        too_many = range(1, 102)
+        for ids in ([], ["a"], ["1", ""], too_many):
+            res, _ = self.batch("airport", ids)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, ids)
@@ -0,0 +1,251 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import exceptions, status
+from rest_framework.test import APIClient
+
+from airport.booking import FlightBusy, SeatsUnavailable, lock_flights
+from airport.models import Flight, Order, Ticket
+from airport.serializers import OrderSerializer
+from airport.tests.tests_flight_api import sample_flight
+from airport.tests.tests_order_api import ORDER_URL
+
+
+def order_payload(*seats):
+    return {
+        "tickets": [
+            {"flight": flight.id, "row": row, "seat": seat}
+            for flight, row, seat in seats
+        ]
+    }
+
+
+class BookingConflictTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.other_flight = sample_flight()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+    def test_taken_seats_are_listed(self):
+        res = self.client.post(
+            ORDER_URL,
+            order_payload(
+                (self.flight, 1, 1), (self.flight, 1, 2), (self.other_flight, 1, 1)
+            ),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["taken"], [{"flight": self.flight.id, "row": 1, "seat": 1}]
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_seat_requested_twice(self):
+        res = self.client.post(
+            ORDER_URL,
+            order_payload((self.flight, 2, 2), (self.flight, 2, 2)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["taken"], [{"flight": self.flight.id, "row": 2, "seat": 2}]
+        )
+
+    def test_multi_flight_order(self):
+        res = self.client.post(
+            ORDER_URL,
+            order_payload((self.other_flight, 1, 1), (self.flight, 1, 2)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    def test_flight_deleted_after_validation(self):
+        serializer = OrderSerializer(
+            data=order_payload((self.flight, 1, 2), (self.other_flight, 1, 1))
+        )
+        serializer.is_valid(raise_exception=True)
+        flight_id = self.other_flight.id
+        self.other_flight.delete()
+
+        with self.assertRaises(exceptions.ValidationError) as context:
+            serializer.save(user=self.user)
+
+        self.assertEqual(
+            context.exception.detail["tickets"],
+            [f"Flight {flight_id} is no longer available."],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_other_integrity_errors_are_not_conflicts(self):
+        serializer = OrderSerializer(data=order_payload((self.flight, 1, 2)))
+        serializer.is_valid(raise_exception=True)
+
+        with patch.object(Ticket, "save", side_effect=IntegrityError("check")):
+            with self.assertRaises(IntegrityError):
+                serializer.save(user=self.user)
+
+
+class TicketSaveTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.order = Order.objects.create(user=self.user)
+        self.flight = Flight.objects.select_related("airplane").get(
+            id=sample_flight().id
+        )
+
+    def test_save_with_loaded_flight_is_one_insert(self):
+        with self.assertNumQueries(1):
+            Ticket(row=1, seat=1, flight=self.flight, order=self.order).save(
+                touch=False
+            )
+
+    def test_save_touches_the_flight(self):
+        with self.assertNumQueries(2):
+            Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        self.assertGreater(
+            Flight.objects.get(id=self.flight.id).updated_at, self.flight.updated_at
+        )
+
+    def test_save_without_validation_is_one_insert(self):
+        ticket = Ticket(
+            row=1,
+            seat=2,
+            flight_id=self.flight.id,
+            flight_departure=self.flight.departure_time,
+            order=self.order,
+        )
+        with self.assertNumQueries(1):
+            ticket.save(validate=False, touch=False)
+
+    def test_flight_is_loaded_with_one_query(self):
+        ticket = Ticket(row=1, seat=3, flight_id=self.flight.id, order=self.order)
+        with self.assertNumQueries(2):
+            ticket.save(touch=False)
+
+    def test_seat_out_of_airplane(self):
+        with self.assertNumQueries(0), self.assertRaises(ValueError):
+            Ticket.objects.create(
+                row=self.flight.airplane.rows + 1,
+                seat=1,
+                flight=self.flight,
+                order=self.order,
+            )
+
+    def test_taken_seat_raises_validation_error(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        with self.assertRaises(ValidationError) as context, transaction.atomic():
+            Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        self.assertIn("already exists", str(context.exception))
+
+    def test_order_writes_each_ticket_with_one_query(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            res = client.post(
+                ORDER_URL,
+                order_payload((self.flight, 2, 1), (self.flight, 2, 2)),
+                format="json",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        ticket_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if "airport_ticket" in query["sql"]
+        ]
+        # The seat check under the flight lock, two inserts, the response
+        self.assertEqual(len(ticket_queries), 4)
+        self.assertEqual(sum(sql.startswith("INSERT") for sql in ticket_queries), 2)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "requires PostgreSQL")
+class ConcurrentBookingTests(TransactionTestCase):
+    """Books from many threads, each with its own database connection"""
+
+    threads = 8
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.flight = sample_flight()
+        self.other_flight = sample_flight()
+
+    def book_concurrently(self, payloads):
+        results = []
+        barrier = threading.Barrier(len(payloads))
+
+        def book(serializer):
+            barrier.wait(timeout=10)
+            try:
+                serializer.save(user=self.user)
+                results.append("booked")
+            except (SeatsUnavailable, FlightBusy) as error:
+                results.append(error.default_code)
+            except Exception as error:
+                results.append(repr(error))
+            finally:
+                connection.close()
+
+        serializers = [OrderSerializer(data=payload) for payload in payloads]
+        for serializer in serializers:
+            serializer.is_valid(raise_exception=True)
+
+        workers = [
+            threading.Thread(target=book, args=(serializer,))
+            for serializer in serializers
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return sorted(results)
+
+    def test_same_seat_is_sold_once(self):
+        results = self.book_concurrently(
+            [order_payload((self.flight, 1, 1))] * self.threads
+        )
+
+        self.assertEqual(
+            results, ["booked"] + ["seats_unavailable"] * (self.threads - 1)
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_crossed_multi_flight_orders_do_not_deadlock(self):
+        payloads = []
+        for row in range(1, self.threads + 1):
+            # Half of the orders list the flights in reverse
+            flights = (self.flight, self.other_flight)
+            if row % 2 == 0:
+                flights = flights[::-1]
+            payloads.append(order_payload(*((flight, row, 1) for flight in flights)))
+
+        results = self.book_concurrently(payloads)
+
+        self.assertEqual(results, ["booked"] * self.threads)
+        self.assertEqual(Ticket.objects.count(), 2 * self.threads)
+
+    @override_settings(BOOKING_LOCK_TIMEOUT=0.2)
+    def test_lock_wait_is_bounded(self):
+        with transaction.atomic():
+            lock_flights([self.flight.id])
+            results = self.book_concurrently([order_payload((self.flight, 1, 1))])
+
+        self.assertEqual(results, ["flight_busy"])
+        self.assertEqual(Ticket.objects.count(), 0)
@@ -0,0 +1,169 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import geo
+from airport.models import Airport, City, Country, Crew, Route
+from airport.tests.tests_flight_api import sample_airport, sample_city
+
+
+def bulk_url(basename):
+    return reverse(f"airport:{basename}-bulk")
+
+
+class BulkWriteTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="admin@admin.test", password="adminpassword", is_staff=True
+            )
+        )
+
+    def bulk(self, basename, items, method="post"):
+        with CaptureQueriesContext(connection) as context:
+            res = getattr(self.client, method)(bulk_url(basename), items, format="json")
+        return res, [
+            query["sql"]
+            for query in context.captured_queries
+            if "airport_ratecounter" not in query["sql"]
+        ]
+
+    def test_admin_required(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test1234")
+        )
+
+        res, _ = self.bulk("country", [{"name": "Country"}])
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_with_one_query_per_model(self):
+        countries = [Country.objects.create(name=f"Country {i}") for i in range(3)]
+        items = [
+            {"name": f"City {i}", "country": countries[i % 3].id} for i in range(30)
+        ]
+
+        res, queries = self.bulk("city", items)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            len([query for query in queries if "airport_country" in query]), 1
+        )
+        self.assertEqual(
+            len([query for query in queries if query.startswith("INSERT")]), 1
+        )
+        self.assertEqual(City.objects.count(), 30)
+        self.assertEqual(res.data[4]["country"], countries[1].id)
+        self.assertEqual(res.data[4]["id"], City.objects.get(name="City 4").id)
+
+    def test_errors_are_reported_per_item(self):
+        city = sample_city()
+
+        res, _ = self.bulk(
+            "airport",
+            [
+                {"name": "Valid", "closest_big_city": city.id},
+                {"name": "Unknown city", "closest_big_city": city.id + 1},
+                {"name": "Not a city", "closest_big_city": "city"},
+                {"closest_big_city": city.id, "latitude": 91},
+            ],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertEqual(list(res.data[1]), ["closest_big_city"])
+        self.assertEqual(list(res.data[2]), ["closest_big_city"])
+        self.assertEqual(set(res.data[3]), {"name", "latitude"})
+        self.assertFalse(Airport.objects.exists())
+
+    def test_not_a_list(self):
+        res, _ = self.bulk("crew", {"first_name": "First", "last_name": "Last"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update(self):
+        crew = [
+            Crew.objects.create(first_name=f"First {i}", last_name="Last")
+            for i in range(3)
+        ]
+
+        res, queries = self.bulk(
+            "crew",
+            [
+                {"id": crew[0].id, "last_name": "Changed"},
+                {"id": crew[2].id, "first_name": "Renamed"},
+            ],
+            method="patch",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len([query for query in queries if query.startswith("UPDATE")]), 1
+        )
+        self.assertEqual(
+            list(Crew.objects.order_by("id").values_list("first_name", "last_name")),
+            [("First 0", "Changed"), ("First 1", "Last"), ("Renamed", "Last")],
+        )
+
+    def test_update_unknown_and_repeated_ids(self):
+        crew = Crew.objects.create(first_name="First", last_name="Last")
+
+        res, _ = self.bulk(
+            "crew",
+            [
+                {"id": crew.id, "last_name": "Changed"},
+                {"id": crew.id, "last_name": "Again"},
+                {"id": crew.id + 1, "last_name": "Unknown"},
+                {"last_name": "No id"},
+            ],
+            method="patch",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        for error in res.data[1:]:
+            self.assertEqual(list(error), ["id"])
+        crew.refresh_from_db()
+        self.assertEqual(crew.last_name, "Last")
+
+    def test_route_distances(self):
+        paris = sample_airport(name="CDG", latitude=49.0097, longitude=2.5479)
+        london = sample_airport(name="LHR", latitude=51.47, longitude=-0.4543)
+
+        res, _ = self.bulk(
+            "route",
+            [
+                {"source": paris.id, "destination": london.id},
+                {"source": london.id, "destination": paris.id, "distance": 5},
+            ],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Route.objects.values_list("distance", flat=True)),
+            {round(paris.distance_to(london))},
+        )
+
+    def test_moved_airports_update_their_routes(self):
+        source = sample_airport(name="Source", latitude=0, longitude=0)
+        destination = sample_airport(name="Destination", latitude=1, longitude=0)
+        route = Route.objects.create(source=source, destination=destination)
+        geo.get_index()
+        self.addCleanup(geo.clear_index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res, _ = self.bulk(
+                "airport",
+                [{"id": destination.id, "latitude": 2}, {"id": source.id}],
+                method="patch",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 222)
+        self.assertIsNone(geo._index)
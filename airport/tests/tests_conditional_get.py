@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Order, Ticket
+from airport.tests.tests_airplane_api import detail_flight_url
+from airport.tests.tests_flight_api import FLIGHT_URL, sample_flight
+from airport.tests.tests_order_api import ORDER_URL
+from airport.tests.tests_sparse_fields import model_queries
+
+ROUTE_URL = reverse("airport:route-list")
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+
+    def get(self, url, etag=None, **params):
+        headers = {"If-None-Match": etag} if etag else {}
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url, params, headers=headers)
+        return res, model_queries(context)
+
+    def test_not_modified_before_serializing(self):
+        url = detail_flight_url(self.flight.id)
+        res, _ = self.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", res)
+
+        not_modified, queries = self.get(url, res["ETag"])
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified["ETag"], res["ETag"])
+        self.assertEqual(len(queries), 1)
+
+    def test_if_modified_since(self):
+        url = detail_flight_url(self.flight.id)
+        res, _ = self.get(url)
+
+        not_modified = self.client.get(
+            url, headers={"If-Modified-Since": res["Last-Modified"]}
+        )
+
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_sold_ticket_changes_the_flight(self):
+        detail, _ = self.get(detail_flight_url(self.flight.id))
+        listed, _ = self.get(FLIGHT_URL)
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res, _ = self.get(detail_flight_url(self.flight.id), detail["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_tickets"], [{"row": 1, "seat": 1}])
+        res, _ = self.get(FLIGHT_URL, listed["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_cancelled_order_changes_the_flight(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+        res, _ = self.get(detail_flight_url(self.flight.id))
+
+        order.delete()
+
+        res, _ = self.get(detail_flight_url(self.flight.id), res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["taken_tickets"], [])
+
+    def test_renamed_crew_changes_the_flight(self):
+        crew = Crew.objects.create(first_name="First", last_name="Last")
+        self.flight.crew.add(crew)
+        res, _ = self.get(detail_flight_url(self.flight.id))
+
+        crew.last_name = "Renamed"
+        crew.save()
+
+        res, _ = self.get(detail_flight_url(self.flight.id), res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_renamed_airport_changes_the_routes(self):
+        res, _ = self.get(ROUTE_URL)
+
+        airport = self.flight.route.source
+        airport.name = "Renamed"
+        airport.save()
+
+        res, _ = self.get(ROUTE_URL, res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["source"], "Renamed")
+
+    def test_deleted_object_changes_the_list(self):
+        other_flight = sample_flight(departure_time="2024-08-25 10:00")
+        res, _ = self.get(FLIGHT_URL)
+
+        other_flight.delete()
+
+        res, _ = self.get(FLIGHT_URL, res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", res)
+
+    def test_date_searches_are_not_validated(self):
+        res, _ = self.get(FLIGHT_URL, departure_time="2024-08-25")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", res)
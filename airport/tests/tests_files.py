@@ -0,0 +1,75 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from airport_api_service.files import FilesApplication
+
+
+def fallback_app(environ, start_response):
+    start_response("200 OK", [])
+    return [b"django"]
+
+
+class FilesApplicationTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.root.name, "plane 1.jpg"), "wb") as file:
+            file.write(b"image")
+        self.app = FilesApplication(fallback_app, {"/media/": self.root.name})
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    def request(self, path, **environ):
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = status
+            response["headers"] = dict(headers)
+
+        environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path, **environ}
+        body = self.app(environ, start_response)
+        response["body"] = b"".join(body)
+        if hasattr(body, "close"):
+            body.close()
+        return response
+
+    def test_file_is_served(self):
+        res = self.request("/media/plane 1.jpg")
+
+        self.assertEqual(res["status"], "200 OK")
+        self.assertEqual(res["body"], b"image")
+        self.assertEqual(res["headers"]["Content-Type"], "image/jpeg")
+        self.assertEqual(res["headers"]["Content-Length"], "5")
+
+    def test_file_wrapper_is_used(self):
+        wrapped = []
+
+        def file_wrapper(file, block_size):
+            wrapped.append(file)
+            return iter([file.read()])
+
+        res = self.request("/media/plane 1.jpg", **{"wsgi.file_wrapper": file_wrapper})
+        wrapped[0].close()
+
+        self.assertEqual(res["body"], b"image")
+        self.assertEqual(len(wrapped), 1)
+
+    def test_not_modified(self):
+        etag = self.request("/media/plane 1.jpg")["headers"]["ETag"]
+
+        res = self.request("/media/plane 1.jpg", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res["status"], "304 Not Modified")
+        self.assertEqual(res["body"], b"")
+
+    def test_path_outside_root_is_not_served(self):
+        res = self.request("/media/../../etc/passwd")
+
+        self.assertEqual(res["status"], "404 Not Found")
+
+    def test_other_paths_reach_django(self):
+        res = self.request("/api/v1/airport/")
+
+        self.assertEqual(res["body"], b"django")
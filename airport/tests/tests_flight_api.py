@@ -1,10 +1,20 @@
 from django.contrib.auth import get_user_model
+from django.db.models import F, Count
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from airport.models import Country, City, Airport, Route, Flight, Crew
+from airport.models import (
+    Country,
+    City,
+    Airport,
+    Route,
+    Flight,
+    Crew,
+    Order,
+    Ticket,
+)
 from airport.serializers import FlightListSerializer
 from airport.tests.tests_airplane_api import (
     detail_flight_url,
@@ -25,7 +35,8 @@ def sample_city(**params):
 
 
 def sample_airport(**params):
-    city = sample_city(**params)
+    # Named after the airport, other params like coordinates are the airport's
+    city = sample_city(name=params["name"]) if "name" in params else sample_city()
 
     defaults = {"name": "Airport", "closest_big_city": city}
     defaults.update(params)
@@ -152,6 +163,21 @@ class AuthenticatedFlightApiTests(TestCase):
         self.assertIn(flight_2.id, res_ids)
         self.assertNotIn(flight_3.id, res_ids)
 
+    def test_list_matches_flight_list_serializer(self):
+        flight = sample_flight()
+        sample_flight(departure_time="2024-08-25 23:59")
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+
+        res = self.client.get(FLIGHT_URL)
+
+        flights = Flight.objects.annotate(
+            tickets_available=F("airplane__rows") * F("airplane__seats_in_row")
+            - Count("tickets")
+        ).order_by("-departure_time")
+        serializer = FlightListSerializer(flights, many=True)
+        self.assertEqual(res.data["results"], serializer.data)
+
     def test_create_flight_forbidden(self):
         route = sample_route()
         airplane = sample_airplane()
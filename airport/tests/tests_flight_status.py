@@ -0,0 +1,226 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import flight_status
+from airport.flight_status import StatusHub
+from airport.models import Flight, FlightStatusChange
+from airport.tests.tests_flight_api import sample_flight
+from airport.tests.tests_sparse_fields import model_queries
+from airport.throttling import UserSlidingRateThrottle
+
+STREAM_SETTINGS = {
+    "POLL_INTERVAL": 1.0,
+    "HEARTBEAT": 0.01,
+    "STREAM_TIMEOUT": 0,
+    "RETRY": 2000,
+    "GAP_TIMEOUT": 10,
+}
+
+
+def status_url(flight_id):
+    return reverse("airport:flight-current-status", args=[flight_id])
+
+
+def stream_url(flight_id):
+    return reverse("airport:flight-status-stream", args=[flight_id])
+
+
+def delay(flight, minutes):
+    flight = Flight.objects.get(id=flight.id)
+    flight.status = Flight.Status.DELAYED
+    flight.delay_minutes = minutes
+    flight.save()
+    return flight.status_changes.last()
+
+
+class StatusLogTests(TestCase):
+    def test_status_change_is_logged(self):
+        flight = sample_flight()
+
+        change = delay(flight, 30)
+
+        self.assertEqual(change.status, Flight.Status.DELAYED)
+        self.assertEqual(change.delay_minutes, 30)
+
+    def test_other_changes_are_not_logged(self):
+        flight = Flight.objects.get(id=sample_flight().id)
+        flight.arrival_time = "2024-08-24 09:00"
+        flight.save()
+
+        self.assertFalse(FlightStatusChange.objects.exists())
+
+    def test_str(self):
+        flight = sample_flight()
+        change = delay(flight, 30)
+
+        self.assertEqual(
+            str(flight),
+            f"{flight.route.source} - {flight.route.distance}:"
+            f"{flight.departure_time} -> {flight.arrival_time}",
+        )
+        self.assertEqual(str(change), f"{flight.id}: delayed ({change.changed_at})")
+
+
+class StatusHubTests(TestCase):
+    def setUp(self):
+        self.hub = StatusHub(autostart=False)
+        self.flight = sample_flight()
+        self.other_flight = sample_flight()
+
+    def test_one_query_per_poll_for_all_watchers(self):
+        watchers = [self.hub.subscribe(self.flight.id) for _ in range(50)]
+        other_watcher = self.hub.subscribe(self.other_flight.id)
+        change = delay(self.flight, 15)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.hub.poll(), 1)
+
+        for watcher in watchers:
+            event = watcher.get_nowait()
+            self.assertEqual(event["id"], change.id)
+            self.assertEqual(event["delay_minutes"], 15)
+        self.assertTrue(other_watcher.empty())
+
+    def test_changes_before_subscribing_are_skipped(self):
+        delay(self.flight, 15)
+        watcher = self.hub.subscribe(self.flight.id)
+
+        self.assertEqual(self.hub.poll(), 0)
+        self.assertTrue(watcher.empty())
+
+    def test_late_commit_is_delivered(self):
+        watcher = self.hub.subscribe(self.flight.id)
+        first = delay(self.flight, 5)
+        late = delay(self.flight, 10)
+        last = delay(self.flight, 15)
+        # A row whose transaction commits after a later one was read
+        late_id = late.id
+        late.delete()
+        self.hub.poll()
+        FlightStatusChange.objects.create(
+            id=late_id,
+            flight=self.flight,
+            status=late.status,
+            delay_minutes=late.delay_minutes,
+            departure_time=late.departure_time,
+        )
+        self.hub.poll()
+
+        events = [watcher.get_nowait()["id"] for _ in range(3)]
+        self.assertEqual(events, [first.id, last.id, late_id])
+
+    def test_unsubscribed_watcher_gets_nothing(self):
+        watcher = self.hub.subscribe(self.flight.id)
+        self.hub.unsubscribe(self.flight.id, watcher)
+        delay(self.flight, 15)
+
+        self.hub.poll()
+
+        self.assertTrue(watcher.empty())
+
+
+@override_settings(FLIGHT_STATUS_STREAM=STREAM_SETTINGS)
+class FlightStatusApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test1234")
+        )
+        self.flight = sample_flight()
+        self.hub = StatusHub(autostart=False)
+        # Streams of the views use this hub instead of starting a thread
+        patcher = patch.object(flight_status, "hub", self.hub)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_stream(self, **headers):
+        res = self.client.get(
+            stream_url(self.flight.id), HTTP_ACCEPT="text/event-stream", **headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        return b"".join(res.streaming_content).decode()
+
+    def test_current_status(self):
+        change = delay(self.flight, 20)
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(status_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["id"], change.id)
+        self.assertEqual(res.data["status"], "delayed")
+        self.assertEqual(res.data["delay_minutes"], 20)
+        self.assertEqual(len(model_queries(context)), 1)
+
+    def test_unknown_flight(self):
+        res = self.client.get(status_url(self.flight.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stream_starts_with_current_status(self):
+        body = self.read_stream()
+
+        self.assertTrue(body.startswith("retry: 2000\n\n"))
+        self.assertIn("event: status\ndata: ", body)
+        self.assertIn('"status": "scheduled"', body)
+
+    def test_first_event_without_changes_has_no_id(self):
+        lines = self.read_stream().splitlines()
+
+        self.assertIn("event: status", lines)
+        self.assertFalse([line for line in lines if line.startswith("id:")])
+
+    def test_stream_is_not_compressed(self):
+        res = self.client.get(
+            stream_url(self.flight.id),
+            HTTP_ACCEPT="text/event-stream",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        self.assertFalse(res.has_header("Content-Encoding"))
+        self.assertEqual(next(iter(res.streaming_content)), b"retry: 2000\n\n")
+
+    def test_stream_replays_missed_changes(self):
+        first = delay(self.flight, 10)
+        second = delay(self.flight, 40)
+
+        body = self.read_stream(HTTP_LAST_EVENT_ID=str(first.id))
+
+        self.assertNotIn(f"id: {first.id}\n", body)
+        self.assertIn(f"id: {second.id}\nevent: status\n", body)
+        self.assertIn('"delay_minutes": 40', body)
+
+    def test_reconnects_skip_the_daily_quota(self):
+        rates = {"user": "1/day", "status": "3/min"}
+        with patch.object(UserSlidingRateThrottle, "THROTTLE_RATES", rates):
+            for _ in range(3):
+                self.read_stream()
+            res = self.client.get(status_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_stream_pushes_changes(self):
+        events = flight_status.stream(
+            self.flight.id,
+            flight_status.current_status(self.flight.id),
+        )
+        with override_settings(
+            FLIGHT_STATUS_STREAM=dict(STREAM_SETTINGS, STREAM_TIMEOUT=5)
+        ):
+            next(events)
+            next(events)
+            change = delay(self.flight, 25)
+            self.hub.poll()
+            event = next(events)
+            events.close()
+
+        self.assertTrue(event.startswith(f"id: {change.id}\nevent: status\n"))
+        self.assertFalse(self.hub._watchers)
@@ -0,0 +1,177 @@
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import geo
+from airport.geo import AirportIndex, haversine_km, update_route_distances
+from airport.models import Airport, Route
+from airport.tests.tests_flight_api import sample_airport
+
+NEARBY_URL = reverse("airport:airport-nearby")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class HaversineTests(SimpleTestCase):
+    def test_known_distances(self):
+        # One degree along a meridian and London Heathrow - New York JFK
+        self.assertAlmostEqual(float(haversine_km(0, 0, 1, 0)), 111.195, places=2)
+        self.assertAlmostEqual(
+            float(haversine_km(51.47, -0.4543, 40.6413, -73.7781)), 5540, delta=5
+        )
+
+    def test_antipodes(self):
+        self.assertAlmostEqual(
+            float(haversine_km(10, 20, -10, -160)), geo.MAX_DISTANCE_KM, places=3
+        )
+
+
+class AirportIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        count = 2000
+        self.latitudes = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+        self.longitudes = rng.uniform(-180, 180, count)
+        # Points on the antimeridian and next to the poles
+        self.latitudes[:4] = [0, 0, 89.9, -89.95]
+        self.longitudes[:4] = [180, -179.99, 10, -120]
+        self.ids = np.arange(1, count + 1)
+        self.index = AirportIndex(self.ids, self.latitudes, self.longitudes)
+
+    def brute_force(self, latitude, longitude):
+        distances = haversine_km(latitude, longitude, self.latitudes, self.longitudes)
+        order = np.argsort(distances, kind="stable")
+        return [(int(self.ids[i]), float(distances[i])) for i in order]
+
+    def test_within_matches_brute_force(self):
+        points = [(0, 179.5), (0, -179.5), (89.5, 0), (-89.9, 45), (48.8, 2.3)]
+        for latitude, longitude in points:
+            expected = self.brute_force(latitude, longitude)
+            for radius in (50, 300, 1500, 8000, 25000):
+                found = self.index.within(latitude, longitude, radius)
+                self.assertEqual(
+                    [airport_id for airport_id, _ in found],
+                    [airport_id for airport_id, d in expected if d <= radius],
+                    (latitude, longitude, radius),
+                )
+
+    def test_nearest_matches_brute_force(self):
+        for latitude, longitude in [(0, 180), (70, -30), (-45, 100)]:
+            expected = self.brute_force(latitude, longitude)
+            found = self.index.nearest(latitude, longitude, count=5)
+            self.assertEqual(found, expected[:5])
+
+    def test_nearest_in_an_empty_index(self):
+        index = AirportIndex([], [], [])
+
+        self.assertEqual(index.nearest(0, 0, count=3), [])
+
+
+class RouteDistanceTests(TestCase):
+    def setUp(self):
+        self.source = sample_airport(name="Source", latitude=0, longitude=0)
+        self.destination = sample_airport(name="Destination", latitude=1, longitude=0)
+
+    def test_route_distance_is_computed(self):
+        route = Route.objects.create(
+            source=self.source, destination=self.destination, distance=5
+        )
+
+        self.assertEqual(route.distance, 111)
+
+    def test_distance_without_coordinates_is_kept(self):
+        route = Route.objects.create(
+            source=self.source,
+            destination=sample_airport(name="Unknown"),
+            distance=500,
+        )
+
+        self.assertEqual(route.distance, 500)
+
+    def test_moving_an_airport_updates_its_routes(self):
+        route = Route.objects.create(source=self.source, destination=self.destination)
+        airport = Airport.objects.get(id=self.destination.id)
+        airport.latitude = 2
+        airport.save()
+
+        route.refresh_from_db()
+        self.assertEqual(route.distance, 222)
+
+    def test_bulk_update(self):
+        airports = [
+            sample_airport(name=f"Airport {i}", latitude=i, longitude=i)
+            for i in range(1, 6)
+        ]
+        Route.objects.bulk_create(
+            Route(source=self.source, destination=airport) for airport in airports
+        )
+
+        with self.assertNumQueries(2):
+            changed = update_route_distances(batch_size=1000)
+
+        self.assertEqual(changed, 5)
+        self.assertEqual(
+            list(
+                Route.objects.filter(source=self.source)
+                .order_by("id")
+                .values_list("distance", flat=True)
+            ),
+            [round(float(haversine_km(0, 0, i, i))) for i in range(1, 6)],
+        )
+        self.assertEqual(update_route_distances(), 0)
+
+
+class NearbyAirportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test1234")
+        )
+        self.paris = sample_airport(name="CDG", latitude=49.0097, longitude=2.5479)
+        self.orly = sample_airport(name="ORY", latitude=48.7262, longitude=2.3652)
+        self.london = sample_airport(name="LHR", latitude=51.47, longitude=-0.4543)
+        self.unknown = sample_airport(name="Unknown")
+        geo.clear_index()
+        self.addCleanup(geo.clear_index)
+
+    def test_within_radius(self):
+        res = self.client.get(NEARBY_URL, {"lat": 48.85, "lon": 2.35, "radius": 50})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["name"] for item in res.data], ["ORY", "CDG"])
+        self.assertLess(res.data[0]["distance"], res.data[1]["distance"])
+
+    def test_nearest_to_an_airport(self):
+        res = self.client.get(NEARBY_URL, {"airport": self.paris.id, "count": 2})
+
+        self.assertEqual([item["name"] for item in res.data], ["ORY", "LHR"])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {},
+            {"lat": 100, "lon": 0},
+            {"lat": "north", "lon": 0},
+            {"airport": self.unknown.id},
+            {"lat": 0, "lon": 0, "count": 0},
+            {"lat": 0, "lon": 0, "radius": "nan"},
+            {"lat": 0, "lon": 0, "radius": "inf"},
+            {"lat": 0, "lon": 0, "radius": -1},
+            {"lat": 0, "lon": 0, "radius": 0},
+            {"lat": 0, "lon": 0, "radius": 20000},
+            {"lat": "nan", "lon": 0, "radius": 10},
+        ):
+            res = self.client.get(NEARBY_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_routes_sorted_by_distance(self):
+        long_route = Route.objects.create(source=self.paris, destination=self.london)
+        short_route = Route.objects.create(source=self.paris, destination=self.orly)
+
+        res = self.client.get(ROUTE_URL, {"ordering": "distance"})
+
+        self.assertEqual(
+            [route["id"] for route in res.data["results"]],
+            [short_route.id, long_route.id],
+        )
@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.utils import OperationalError
+from django.test import TestCase
+
+from airport_api_service.health import HealthCheckApplication, pending_migrations
+
+
+def django_app(environ, start_response):
+    start_response("200 OK", [])
+    return [b"django"]
+
+
+class WaitForDbCommandTests(TestCase):
+    @patch("airport.management.commands.wait_for_db.time.sleep")
+    @patch("airport.management.commands.wait_for_db.ping_database")
+    def test_retries_with_backoff_until_ready(self, ping, sleep):
+        ping.side_effect = [OperationalError] * 3 + [None]
+        out = StringIO()
+
+        call_command("wait_for_db", "--initial-delay=1", stdout=out)
+
+        self.assertEqual(ping.call_count, 4)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        for delay, bound in zip(delays, [1, 2, 4]):
+            self.assertLessEqual(delay, bound)
+        self.assertEqual(out.getvalue().count("Database available"), 1)
+
+    @patch("airport.management.commands.wait_for_db.time.sleep")
+    @patch("airport.management.commands.wait_for_db.ping_database")
+    def test_gives_up_after_timeout(self, ping, sleep):
+        ping.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout=0", stdout=StringIO())
+
+    def test_migrations_are_applied(self):
+        call_command("wait_for_db", "--check-migrations", stdout=StringIO())
+
+        self.assertEqual(pending_migrations(), set())
+
+
+class HealthCheckApplicationTests(TestCase):
+    def request(self, app, path):
+        response = {}
+
+        def start_response(status, headers):
+            response["status"] = status
+
+        body = b"".join(app({"PATH_INFO": path}, start_response))
+        return response["status"], body
+
+    def test_healthz_does_not_touch_database(self):
+        app = HealthCheckApplication(django_app)
+
+        with self.assertNumQueries(0):
+            status, body = self.request(app, "/healthz")
+
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(json.loads(body), {"status": "ok"})
+
+    def test_readyz_checks_database_and_migrations(self):
+        status, body = self.request(HealthCheckApplication(django_app), "/readyz")
+
+        self.assertEqual(status, "200 OK")
+        self.assertEqual(json.loads(body)["migrations"], "ok")
+
+    @patch("airport_api_service.health.ping_database")
+    def test_readyz_fails_without_database(self, ping):
+        ping.side_effect = OperationalError("connection refused")
+
+        status, body = self.request(HealthCheckApplication(django_app), "/readyz")
+
+        self.assertEqual(status, "503 Service Unavailable")
+        self.assertEqual(json.loads(body)["database"], "unavailable")
+
+    def test_other_paths_reach_django(self):
+        status, body = self.request(HealthCheckApplication(django_app), "/api/")
+
+        self.assertEqual(body, b"django")
@@ -0,0 +1,126 @@
+import datetime
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from airport import trips
+from airport.models import Order, Ticket
+from airport.tests.tests_flight_api import sample_flight
+
+
+def index_columns(model):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table
+        )
+    return {
+        name: constraint["columns"]
+        for name, constraint in constraints.items()
+        if constraint["index"]
+    }
+
+
+def index_and_partitions(name):
+    """Names of an index and of its partitions on the ticket partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relid::text FROM pg_partition_tree(%s)", [name])
+        return [row[0] for row in cursor.fetchall()]
+
+
+class OrderIndexTests(TestCase):
+    def test_composite_indexes(self):
+        order_indexes = index_columns(Order)
+        ticket_indexes = index_columns(Ticket)
+
+        self.assertEqual(
+            order_indexes["airport_order_user_created"][:2], ["user_id", "created_at"]
+        )
+        self.assertEqual(
+            ticket_indexes["airport_ticket_order_flight"][:2], ["order_id", "flight_id"]
+        )
+        # Indexes of the leading columns alone are redundant
+        self.assertNotIn(["user_id"], order_indexes.values())
+        self.assertNotIn(["order_id"], ticket_indexes.values())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "requires PostgreSQL")
+class OrderQueryPlanTests(TestCase):
+    """Plans of the order history and trip queries of one of many users"""
+
+    USERS = 1000
+    ORDERS = 100_000
+    FLIGHTS = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{i}@test.com") for i in range(cls.USERS)
+        )
+        cls.user = users[0]
+        start = timezone.now() + datetime.timedelta(days=1)
+        flights = [
+            sample_flight(
+                departure_time=start + datetime.timedelta(days=i),
+                arrival_time=start + datetime.timedelta(days=i, hours=2),
+            )
+            for i in range(cls.FLIGHTS)
+        ]
+
+        with connection.cursor() as cursor:
+            # One ticket per order, orders take turns between users
+            cursor.execute(
+                """
+                INSERT INTO airport_order (user_id, created_at)
+                SELECT (%s::bigint[])[n %% %s + 1], %s - n * interval '1 minute'
+                FROM generate_series(1, %s) AS n
+                """,
+                [[user.id for user in users], cls.USERS, start, cls.ORDERS],
+            )
+            cursor.execute(
+                """
+                INSERT INTO airport_ticket
+                    ("row", seat, flight_id, order_id, flight_departure)
+                SELECT o.id, 1, f.id, o.id, f.departure_time
+                FROM airport_order o
+                JOIN airport_flight f ON f.id = (%s::bigint[])[o.id %% %s + 1]
+                """,
+                [[flight.id for flight in flights], cls.FLIGHTS],
+            )
+            cursor.execute("ANALYZE airport_order, airport_ticket")
+
+    def assertUsesTicketIndex(self, plan):
+        self.assertTrue(
+            any(
+                f"using {name} " in plan
+                for name in index_and_partitions("airport_ticket_order_flight")
+            ),
+            plan,
+        )
+
+    def test_order_history_is_read_in_index_order(self):
+        plan = (
+            Order.objects.filter(user=self.user).order_by("-created_at")[:10].explain()
+        )
+
+        self.assertIn("airport_order_user_created", plan)
+        self.assertNotIn("Sort", plan)
+
+    def test_tickets_of_orders_use_the_covering_index(self):
+        orders = list(
+            Order.objects.filter(user=self.user).values_list("id", flat=True)[:10]
+        )
+
+        plan = Ticket.objects.filter(order__in=orders).explain()
+
+        self.assertUsesTicketIndex(plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_upcoming_trips_use_both_indexes(self):
+        plan = trips.upcoming_trips(self.user.id).explain()
+
+        self.assertIn("airport_order_user_created", plan)
+        self.assertUsesTicketIndex(plan)
+        self.assertNotIn("Seq Scan on airport_order", plan)
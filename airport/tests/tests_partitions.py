@@ -0,0 +1,139 @@
+import unittest
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from airport import partitions
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_airplane_api import detail_flight_url
+from airport.tests.tests_flight_api import sample_flight
+
+
+class PartitionHelpersTests(TestCase):
+    def test_month_arithmetic(self):
+        month = partitions.month_start(
+            datetime(2024, 11, 30, 23, 30, tzinfo=timezone.utc)
+        )
+
+        self.assertEqual(month, datetime(2024, 11, 1, tzinfo=timezone.utc))
+        self.assertEqual(
+            partitions.add_months(month, 2), datetime(2025, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            partitions.add_months(month, -11),
+            datetime(2023, 12, 1, tzinfo=timezone.utc),
+        )
+        self.assertEqual(partitions.partition_name(month), "airport_ticket_y2024m11")
+
+    @unittest.skipIf(connection.vendor == "postgresql", "partitioning is supported")
+    def test_command_requires_postgresql(self):
+        with self.assertRaises(CommandError):
+            call_command("ticket_partitions")
+
+
+class TicketPartitionKeyTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.flight.refresh_from_db()
+        self.order = Order.objects.create(user=self.user)
+
+    def test_ticket_copies_flight_departure(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        self.assertEqual(
+            Ticket.objects.get().flight_departure, self.flight.departure_time
+        )
+
+    def test_rescheduling_flight_moves_tickets(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+
+        self.flight.departure_time = datetime(2024, 9, 1, 10, tzinfo=timezone.utc)
+        self.flight.save()
+
+        self.assertEqual(
+            Ticket.objects.get().flight_departure, self.flight.departure_time
+        )
+
+    def test_queryset_updates_move_tickets(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        departure = datetime(2024, 9, 1, 10, tzinfo=timezone.utc)
+
+        Flight.objects.filter(id=self.flight.id).update(departure_time=departure)
+        self.assertEqual(Ticket.objects.get().flight_departure, departure)
+
+        self.flight.departure_time = datetime(2024, 10, 1, 10, tzinfo=timezone.utc)
+        Flight.objects.bulk_update([self.flight], ["departure_time"])
+        self.assertEqual(
+            Ticket.objects.get().flight_departure, self.flight.departure_time
+        )
+        self.assertEqual(
+            Flight.objects.with_tickets_available().get().tickets_available,
+            self.flight.airplane.rows * self.flight.airplane.seats_in_row - 1,
+        )
+
+    def test_retrieve_lists_taken_tickets(self):
+        Ticket.objects.create(row=2, seat=3, flight=self.flight, order=self.order)
+
+        res = self.client.get(detail_flight_url(self.flight.id))
+
+        self.assertEqual(res.data["taken_tickets"], [{"row": 2, "seat": 3}])
+
+    def test_tickets_available(self):
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        sample_flight(departure_time="2024-08-25 23:59")
+
+        available = dict(
+            Flight.objects.with_tickets_available().values_list(
+                "id", "tickets_available"
+            )
+        )
+
+        self.assertEqual(
+            available[self.flight.id],
+            self.flight.airplane.rows * self.flight.airplane.seats_in_row - 1,
+        )
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "requires PostgreSQL")
+class TicketPartitionsCommandTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.flight = sample_flight()
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=self.order)
+        self.flight.refresh_from_db()
+        self.month = partitions.month_start(self.flight.departure_time)
+
+    def ticket_partition(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM airport_ticket")
+            return cursor.fetchone()[0]
+
+    def test_table_is_partitioned(self):
+        self.assertTrue(partitions.is_partitioned(connection))
+        self.assertEqual(self.ticket_partition(), partitions.DEFAULT_PARTITION)
+
+    def test_creates_partitions_and_moves_tickets(self):
+        call_command("ticket_partitions", ahead=1, stdout=StringIO())
+
+        existing = partitions.list_partitions(connection)
+        self.assertIn(self.month, existing)
+        self.assertEqual(self.ticket_partition(), partitions.partition_name(self.month))
+        self.assertEqual(Ticket.objects.get().flight_id, self.flight.id)
+
+    def test_drops_old_partitions(self):
+        call_command(
+            "ticket_partitions", ahead=0, retain=0, drop=True, stdout=StringIO()
+        )
+
+        self.assertNotIn(self.month, partitions.list_partitions(connection))
+        self.assertFalse(Ticket.objects.exists())
@@ -0,0 +1,84 @@
+import gzip
+from datetime import datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+
+import brotli
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from airport.parsers import FastJSONParser
+from airport.renderers import FastJSONRenderer
+from airport.tests.tests_flight_api import FLIGHT_URL, sample_flight
+from airport_api_service.middleware import parse_accept_encoding
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            "id": 1,
+            "name": "Київ  ",
+            "time": datetime(2024, 8, 24, 8, 15, tzinfo=timezone.utc),
+            "price": Decimal("10.50"),
+            "detail": gettext_lazy("Not found."),
+            "items": [None, True, 1.5, {2: "b"}],
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_are_null(self):
+        data = {"nan": float("nan"), "inf": float("inf"), "-inf": float("-inf")}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), b'{"nan":null,"inf":null,"-inf":null}'
+        )
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_indent_is_supported(self):
+        rendered = FastJSONRenderer().render({"id": 1}, "application/json; indent=4")
+
+        self.assertEqual(rendered, b'{\n    "id": 1\n}')
+
+    def test_parser_reads_json(self):
+        data = FastJSONParser().parse(BytesIO('{"name": "Київ"}'.encode()))
+
+        self.assertEqual(data, {"name": "Київ"})
+
+
+@override_settings(COMPRESSION_MIN_SIZE=500)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        for _ in range(5):
+            sample_flight()
+
+    def test_brotli_is_preferred(self):
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(res["Content-Encoding"], "br")
+        self.assertIn(b'"results"', brotli.decompress(res.content))
+
+    def test_gzip_by_quality(self):
+        res = self.client.get(FLIGHT_URL, HTTP_ACCEPT_ENCODING="gzip, br;q=0.5")
+
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn(b'"results"', gzip.decompress(res.content))
+
+    def test_small_responses_are_not_compressed(self):
+        res = self.client.get(FLIGHT_URL, {"limit": 1}, HTTP_ACCEPT_ENCODING="br")
+
+        self.assertFalse(res.has_header("Content-Encoding"))
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding("gzip;q=0.8, br, *;q=0"),
+            {"gzip": 0.8, "br": 1.0, "*": 0.0},
+        )
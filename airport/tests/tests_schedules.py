@@ -0,0 +1,168 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight, FlightSchedule, Ticket
+from airport.tests.tests_airplane_api import sample_airplane
+from airport.tests.tests_flight_api import FLIGHT_URL, sample_flight, sample_route
+from airport.tests.tests_order_api import ORDER_URL
+from airport.tests.tests_seat_assignment import ASSIGN_SEATS_URL
+
+
+def next_weekday(isoweekday):
+    """The first date on the given weekday at least a week from today"""
+    date = timezone.localdate() + datetime.timedelta(days=7)
+    return date + datetime.timedelta(days=(isoweekday - date.isoweekday()) % 7)
+
+
+def sample_schedule(**params):
+    date = next_weekday(1)
+    defaults = {
+        "route": sample_route(),
+        "airplane": sample_airplane(),
+        "weekdays": "135",
+        "departure": datetime.time(8, 15),
+        "duration": datetime.timedelta(hours=2),
+        "valid_from": date - datetime.timedelta(days=30),
+        "valid_until": date + datetime.timedelta(days=30),
+    }
+    defaults.update(params)
+    return FlightSchedule.objects.create(**defaults)
+
+
+class ScheduledSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test1234")
+        )
+        self.schedule = sample_schedule()
+        self.monday = next_weekday(1)
+
+    def search(self, date, **params):
+        res = self.client.get(
+            FLIGHT_URL, {"departure_time": date.isoformat(), "limit": 50, **params}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data["results"]
+
+    def test_departure_is_listed_without_a_flight_row(self):
+        results = self.search(self.monday)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["id"], f"s{self.schedule.id}-{self.monday:%Y%m%d}")
+        self.assertEqual(results[0]["departure_time"], f"{self.monday:%Y-%m-%d} 08:15")
+        self.assertEqual(results[0]["arrival_time"], f"{self.monday:%Y-%m-%d} 10:15")
+        self.assertEqual(
+            results[0]["tickets_available"], self.schedule.airplane.capacity
+        )
+        self.assertFalse(Flight.objects.exists())
+
+    def test_days_off_and_other_periods_are_not_listed(self):
+        self.assertEqual(self.search(self.monday + datetime.timedelta(days=1)), [])
+        self.assertEqual(self.search(self.monday + datetime.timedelta(days=70)), [])
+
+    def test_filters_apply_to_schedules(self):
+        other_airport = self.schedule.route.destination_id
+
+        self.assertEqual(self.search(self.monday, source=other_airport), [])
+        self.assertEqual(len(self.search(self.monday, destination=other_airport)), 1)
+
+    def test_merged_with_flights_of_the_day(self):
+        flight = sample_flight(
+            departure_time=f"{self.monday:%Y-%m-%d} 12:00+00:00",
+            arrival_time=f"{self.monday:%Y-%m-%d} 14:00+00:00",
+        )
+
+        results = self.search(self.monday)
+
+        self.assertEqual(
+            [result["id"] for result in results],
+            [flight.id, f"s{self.schedule.id}-{self.monday:%Y%m%d}"],
+        )
+
+    def test_only_listed_once_saved(self):
+        flight = self.schedule.build_flight(self.monday)
+        flight.save()
+
+        results = self.search(self.monday)
+
+        self.assertEqual([result["id"] for result in results], [flight.id])
+
+
+class ScheduledBookingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "test1234")
+        )
+        self.schedule = sample_schedule()
+        self.crew = Crew.objects.create(first_name="First", last_name="Last")
+        self.schedule.crew.add(self.crew)
+        self.monday = next_weekday(1)
+        self.key = f"s{self.schedule.id}-{self.monday:%Y%m%d}"
+
+    def book(self, *seats, key=None):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"flight": key or self.key, "row": row, "seat": seat}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_first_ticket_saves_the_flight(self):
+        res = self.book((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        flight = Flight.objects.get()
+        self.assertEqual(flight.schedule, self.schedule)
+        self.assertEqual(flight.schedule_date, self.monday)
+        self.assertEqual(list(flight.crew.all()), [self.crew])
+        self.assertEqual(flight.tickets.count(), 2)
+        self.assertEqual(res.data["tickets"][0]["flight"], flight.id)
+
+    def test_later_tickets_use_the_saved_flight(self):
+        self.book((1, 1))
+
+        res = self.book((1, 1), (2, 2))
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        res = self.book((2, 2))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(Flight.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_failed_booking_saves_no_flight(self):
+        res = self.book((1, 1), (1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Flight.objects.exists())
+
+    def test_unknown_departures(self):
+        tuesday = self.monday + datetime.timedelta(days=1)
+        for key in (
+            f"s{self.schedule.id}-{tuesday:%Y%m%d}",
+            f"s{self.schedule.id + 1}-{self.monday:%Y%m%d}",
+            f"s{self.schedule.id}-20261340",
+            "s1",
+        ):
+            res = self.book((1, 1), key=key)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, key)
+
+        self.assertFalse(Flight.objects.exists())
+
+    def test_assign_seats(self):
+        res = self.client.post(
+            ASSIGN_SEATS_URL, {"flight": self.key, "count": 2}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Flight.objects.get().tickets.count(), 2)
@@ -0,0 +1,148 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from airport import schedules, search_cache
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_flight_api import FLIGHT_URL, sample_flight
+from airport.tests.tests_schedules import next_weekday, sample_schedule
+from airport.tests.tests_sparse_fields import model_queries
+from airport.views import FlightViewSet
+
+SEARCH_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "flight-search-tests",
+    },
+    "trips": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+
+class SearchKeyTests(TestCase):
+    def test_equivalent_searches_share_key(self):
+        self.assertEqual(
+            search_cache.search_key({"source": [1, 2], "destination": [3]}),
+            search_cache.search_key({"destination": [3], "source": [1, 2]}),
+        )
+        self.assertNotEqual(
+            search_cache.search_key({"source": [1, 2]}),
+            search_cache.search_key({"destination": [1, 2]}),
+        )
+
+
+@override_settings(CACHES=SEARCH_CACHES)
+class FlightSearchCacheTests(TestCase):
+    def setUp(self):
+        caches["search"].clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight()
+        self.other_flight = sample_flight(departure_time="2024-08-25 10:00")
+
+    def search(self, params):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(FLIGHT_URL, params)
+        return res, model_queries(context)
+
+    def test_normalized_params_hit_cache(self):
+        source = self.flight.route.source_id
+        other_source = self.other_flight.route.source_id
+        res, queries = self.search({"source": f"{source},{other_source}"})
+        # The ETag of the results is read first
+        self.assertEqual(len(queries), 3)
+
+        cached_res, queries = self.search({"source": f"{other_source},{source}"})
+
+        self.assertEqual(cached_res.data, res.data)
+        self.assertEqual(len(queries), 2)
+        self.assertIn('"id" IN', queries[1])
+        self.assertNotIn("airport_ticket", queries[1])
+
+    def test_ticket_sale_invalidates_shown_flights(self):
+        self.search({})
+        order = Order.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+        res, queries = self.search({})
+
+        self.assertEqual(len(queries), 3)
+        available = {
+            flight["id"]: flight["tickets_available"] for flight in res.data["results"]
+        }
+        self.assertEqual(available[self.flight.id], 119)
+
+    def test_ticket_sale_keeps_unrelated_searches(self):
+        date = {"departure_time": "2024-08-25"}
+        self.search(date)
+        order = Order.objects.create(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+        res, queries = self.search(date)
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]], [self.other_flight.id]
+        )
+
+    def test_cancelled_order_invalidates_shown_flights(self):
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+        self.search({})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+
+        res, _ = self.search({})
+        available = {
+            flight["id"]: flight["tickets_available"] for flight in res.data["results"]
+        }
+        self.assertEqual(available[self.flight.id], 120)
+
+    def test_status_update_keeps_unrelated_searches(self):
+        date = {"departure_time": "2024-08-25"}
+        self.search(date)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight.status = Flight.Status.DELAYED
+            self.flight.save()
+
+        _, queries = self.search(date)
+        self.assertEqual(len(queries), 1)
+
+    def test_new_flight_invalidates_results(self):
+        self.search({})
+        with self.captureOnCommitCallbacks(execute=True):
+            flight = sample_flight(departure_time="2024-08-26 10:00")
+
+        res, _ = self.search({})
+
+        self.assertIn(flight.id, [flight["id"] for flight in res.data["results"]])
+
+    def test_saved_schedule_departure_invalidates_results(self):
+        schedule = sample_schedule()
+        self.search({})
+        flight = schedule.build_flight(next_weekday(1))
+        with self.captureOnCommitCallbacks(execute=True):
+            schedules.materialize(flight)
+
+        res, _ = self.search({})
+
+        self.assertIn(flight.id, [flight["id"] for flight in res.data["results"]])
+
+    def test_broad_search_counts_seats_of_the_page_only(self):
+        with patch.object(FlightViewSet, "search_cache_max_size", 1):
+            res, queries = self.search({})
+            _, cached_queries = self.search({})
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertEqual(len([sql for sql in queries if "airport_ticket" in sql]), 1)
+        self.assertEqual(len(cached_queries), len(queries))
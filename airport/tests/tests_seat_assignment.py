@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.tests.tests_airplane_api import sample_airplane
+from airport.tests.tests_flight_api import sample_flight
+
+ASSIGN_SEATS_URL = reverse("airport:order-assign-seats")
+
+
+def suggest_seats_url(flight_id):
+    return reverse("airport:flight-suggest-seats", args=(flight_id,))
+
+
+class SeatAssignmentApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(airplane=sample_airplane(rows=2, seats_in_row=4))
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=2, flight=self.flight, order=order)
+
+    def test_assign_seats_books_block(self):
+        res = self.client.post(
+            ASSIGN_SEATS_URL,
+            {"flight": self.flight.id, "count": 3, "front": True},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        seats = [(ticket["row"], ticket["seat"]) for ticket in res.data["tickets"]]
+        self.assertEqual(seats, [(2, 1), (2, 2), (2, 3)])
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.tickets.count(), 3)
+
+    def test_suggest_seats_matches_assignment(self):
+        params = {"count": 2, "front": "true"}
+
+        suggested = self.client.get(suggest_seats_url(self.flight.id), params)
+        booked = self.client.post(
+            ASSIGN_SEATS_URL, {"flight": self.flight.id, **params}, format="json"
+        )
+
+        self.assertEqual(
+            suggested.data["seats"],
+            [
+                {"row": ticket["row"], "seat": ticket["seat"]}
+                for ticket in booked.data["tickets"]
+            ],
+        )
+        self.assertEqual(Ticket.objects.filter(flight=self.flight).count(), 3)
+
+    def test_assign_seats_when_flight_is_full(self):
+        res = self.client.post(
+            ASSIGN_SEATS_URL, {"flight": self.flight.id, "count": 8}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("count", res.data)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_assign_seats_requires_authentication(self):
+        self.client.force_authenticate(None)
+
+        res = self.client.post(
+            ASSIGN_SEATS_URL, {"flight": self.flight.id, "count": 1}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
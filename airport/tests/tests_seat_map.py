@@ -0,0 +1,133 @@
+import math
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Order, Ticket
+from airport.seat_map import SeatMaps
+from airport.tests.tests_airplane_api import sample_airplane
+from airport.tests.tests_flight_api import sample_flight
+
+
+def adjacent_seats_url(flight_id):
+    return reverse("airport:flight-adjacent-seats", args=(flight_id,))
+
+
+class SeatMapsTests(SimpleTestCase):
+    def setUp(self):
+        # Flight 7: 2 rows x 4 seats, flight 3: 3 rows x 2 seats
+        self.seat_maps = SeatMaps(
+            [7, 3],
+            [2, 3],
+            [4, 2],
+            [(7, 1, 2), (7, 2, 1), (7, 2, 2), (7, 2, 3), (7, 2, 4), (3, 3, 1)],
+        )
+
+    def test_counts(self):
+        self.assertEqual(self.seat_maps.capacity().tolist(), [8, 6])
+        self.assertEqual(self.seat_maps.sold().tolist(), [5, 1])
+        self.assertEqual(self.seat_maps.available().tolist(), [3, 5])
+        np.testing.assert_allclose(self.seat_maps.load_factors(), [5 / 8, 1 / 6])
+
+    def test_row_fill(self):
+        fill = self.seat_maps.row_fill()
+
+        self.assertEqual(fill[0, :2].tolist(), [0.25, 1.0])
+        self.assertTrue(math.isnan(fill[0, 2]))
+        self.assertEqual(fill[1].tolist(), [0.0, 0.0, 0.5])
+
+    def test_find_adjacent(self):
+        self.assertEqual(self.seat_maps.find_adjacent(7, 2), [(1, 3)])
+        self.assertEqual(self.seat_maps.find_adjacent(3, 2), [(1, 1), (2, 1)])
+        self.assertEqual(self.seat_maps.find_adjacent(7, 4), [])
+        self.assertEqual(self.seat_maps.find_adjacent(7, 5), [])
+
+    def test_seats_beyond_airplane_are_not_free(self):
+        self.assertEqual(self.seat_maps.find_adjacent(3, 3), [])
+
+    def test_tickets_beyond_airplane_are_ignored(self):
+        # Flight 3 lost its third row, flight 7 its fourth seat
+        seat_maps = SeatMaps([7, 3], [2, 2], [3, 2], [(7, 1, 4), (3, 3, 1), (3, 1, 1)])
+
+        self.assertEqual(seat_maps.sold().tolist(), [0, 1])
+        self.assertEqual(seat_maps.available().tolist(), [6, 3])
+
+
+class ChooseSeatsTests(SimpleTestCase):
+    def setUp(self):
+        # 3 rows x 4 seats, row 1: _ X _ _, row 2: X X X _, row 3: all free
+        self.seat_maps = SeatMaps(
+            [1], [3], [4], [(1, 1, 2), (1, 2, 1), (1, 2, 2), (1, 2, 3)]
+        )
+
+    def choose(self, count, **preferences):
+        return self.seat_maps.choose_seats(1, count, **preferences)
+
+    def test_together_prefers_emptiest_row(self):
+        self.assertEqual(self.choose(2), [(3, 1), (3, 2)])
+
+    def test_together_front(self):
+        self.assertEqual(self.choose(2, front=True), [(1, 3), (1, 4)])
+
+    def test_together_window(self):
+        self.assertEqual(self.choose(3, window=True), [(3, 1), (3, 2), (3, 3)])
+        self.assertEqual(self.choose(2, window=True, front=True), [(1, 3), (1, 4)])
+
+    def test_scattered_when_no_block(self):
+        self.assertEqual(
+            self.choose(5, front=True), [(1, 1), (1, 3), (1, 4), (2, 4), (3, 1)]
+        )
+
+    def test_window_seats(self):
+        self.assertEqual(
+            self.choose(3, together=False, window=True, front=True),
+            [(1, 1), (1, 4), (2, 4)],
+        )
+
+    def test_not_enough_seats(self):
+        self.assertIsNone(self.choose(9))
+        self.assertEqual(len(self.choose(8)), 8)
+
+
+class AdjacentSeatsApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(airplane=sample_airplane(rows=2, seats_in_row=4))
+        order = Order.objects.create(user=self.user)
+        for row, seat in [(1, 2), (2, 4)]:
+            Ticket.objects.create(row=row, seat=seat, flight=self.flight, order=order)
+
+    def test_adjacent_seats(self):
+        res = self.client.get(adjacent_seats_url(self.flight.id), {"count": 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data, {"count": 3, "blocks": [{"row": 2, "seats": [1, 2, 3]}]}
+        )
+
+    def test_adjacent_seats_invalid_count(self):
+        for count in ("0", "5", "many"):
+            res = self.client.get(adjacent_seats_url(self.flight.id), {"count": count})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seat_report(self):
+        out = StringIO()
+
+        call_command("seat_report", "--adjacent=2", stdout=out)
+
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            [
+                "flight,capacity,sold,available,load_factor,full_rows,blocks_of_2",
+                f"{self.flight.id},8,2,6,0.25,0,3",
+            ],
+        )
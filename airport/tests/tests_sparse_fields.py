@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Order, Ticket
+from airport.tests.tests_airplane_api import detail_flight_url
+from airport.tests.tests_flight_api import FLIGHT_URL, sample_flight
+from airport.tests.tests_order_api import ORDER_URL
+
+
+def model_queries(context):
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT") and "airport_ratecounter" not in query["sql"]
+    ]
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="testpassword"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.flight = sample_flight()
+        self.flight.crew.add(Crew.objects.create(first_name="A", last_name="B"))
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+    def test_fields_prunes_detail(self):
+        res = self.client.get(
+            detail_flight_url(self.flight.id), {"fields": "id,departure_time"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {"id", "departure_time"})
+
+    def test_fields_prunes_list(self):
+        res = self.client.get(FLIGHT_URL, {"fields": "id,tickets_available"})
+
+        self.assertEqual(
+            res.data["results"], [{"id": self.flight.id, "tickets_available": 119}]
+        )
+
+    def test_expand_collapses_nested_objects(self):
+        res = self.client.get(
+            detail_flight_url(self.flight.id),
+            {"fields": "route,crew,taken_tickets", "expand": "route"},
+        )
+
+        self.assertEqual(res.data["route"]["id"], self.flight.route_id)
+        self.assertEqual(
+            res.data["crew"], list(self.flight.crew.values_list("id", flat=True))
+        )
+        self.assertEqual(
+            res.data["taken_tickets"],
+            list(self.flight.tickets.values_list("id", flat=True)),
+        )
+
+    def test_sparse_request_costs_fewer_queries(self):
+        url = detail_flight_url(self.flight.id)
+
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as sparse:
+            res = self.client.get(url, {"fields": "id,departure_time"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # The first query reads the ETag
+        sparse_queries = model_queries(sparse)[1:]
+        self.assertEqual(len(sparse_queries), 1)
+        self.assertLess(len(sparse_queries), len(model_queries(full)) - 1)
+        self.assertNotIn("arrival_time", sparse_queries[0])
+
+    def test_orders_without_expand_return_ticket_ids(self):
+        res = self.client.get(ORDER_URL, {"expand": ""})
+
+        self.assertEqual(
+            res.data["results"][0]["tickets"],
+            list(Ticket.objects.values_list("id", flat=True)),
+        )
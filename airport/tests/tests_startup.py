@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+# Seconds an API-only worker may take to import and configure the app
+STARTUP_TIME_BUDGET = float(os.environ.get("STARTUP_TIME_BUDGET", 1.5))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+import airport_api_service.wsgi
+print(json.dumps({
+    "startup": time.perf_counter() - start,
+    "modules": [
+        name for name in ("drf_spectacular", "debug_toolbar", "airport.admin")
+        if name in sys.modules
+    ],
+}))
+"""
+
+
+def run_probe(**env):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        env=dict(os.environ, **env),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class ApiWorkerStartupTests(SimpleTestCase):
+    def test_cold_start_within_budget(self):
+        # best of three to smooth out a busy machine
+        startup = min(
+            run_probe(DJANGO_PROFILE="prod", DJANGO_API_ONLY="1")["startup"]
+            for _ in range(3)
+        )
+
+        self.assertLess(startup, STARTUP_TIME_BUDGET)
+
+    def test_optional_components_are_not_imported(self):
+        stats = run_probe(DJANGO_PROFILE="prod", DJANGO_API_ONLY="1")
+
+        self.assertEqual(stats["modules"], [])
@@ -0,0 +1,123 @@
+import threading
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIRequestFactory
+
+from airport.models import RateCounter
+from airport.throttling import ActionScopedRateThrottle, UserSlidingRateThrottle
+
+
+class FakeView:
+    def __init__(self, action=None, throttle_scopes=None):
+        self.action = action
+        self.throttle_scopes = throttle_scopes or {}
+
+
+def make_throttle(throttle_class, now, rate=None):
+    throttle = throttle_class()
+    if rate:
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+    throttle.timer = lambda: now
+    return throttle
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="testpassword"
+        )
+        self.request = APIRequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_requests_over_limit_are_throttled(self):
+        view = FakeView()
+        for _ in range(3):
+            throttle = make_throttle(UserSlidingRateThrottle, 1000, "3/min")
+            self.assertTrue(throttle.allow_request(self.request, view))
+
+        throttle = make_throttle(UserSlidingRateThrottle, 1000, "3/min")
+        self.assertFalse(throttle.allow_request(self.request, view))
+        self.assertGreater(throttle.wait(), 0)
+
+    def test_previous_window_is_weighted(self):
+        view = FakeView()
+        for _ in range(4):
+            make_throttle(UserSlidingRateThrottle, 60, "4/min").allow_request(
+                self.request, view
+            )
+
+        # a quarter into the next window 3 previous requests still count
+        throttle = make_throttle(UserSlidingRateThrottle, 135, "4/min")
+        self.assertTrue(throttle.allow_request(self.request, view))
+        throttle = make_throttle(UserSlidingRateThrottle, 135, "4/min")
+        self.assertFalse(throttle.allow_request(self.request, view))
+
+        # three quarters into the next window 1 previous request counts
+        throttle = make_throttle(UserSlidingRateThrottle, 165, "4/min")
+        self.assertTrue(throttle.allow_request(self.request, view))
+
+    def test_counters_have_constant_size(self):
+        view = FakeView()
+        for _ in range(20):
+            make_throttle(UserSlidingRateThrottle, 1000, "50/min").allow_request(
+                self.request, view
+            )
+
+        throttle = make_throttle(UserSlidingRateThrottle, 1000, "50/min")
+        counter = RateCounter.objects.get()
+        self.assertEqual(counter.key, throttle.get_cache_key(self.request, view))
+        self.assertEqual((counter.period, counter.current), (16, 20))
+
+    def test_one_query_per_request(self):
+        view = FakeView()
+        for allowed in (True, False):
+            throttle = make_throttle(UserSlidingRateThrottle, 1000, "1/min")
+            with self.assertNumQueries(1):
+                self.assertEqual(throttle.allow_request(self.request, view), allowed)
+
+        # Throttled requests are not counted
+        self.assertEqual(RateCounter.objects.get().current, 1)
+
+    def test_scope_is_taken_from_view_action(self):
+        booking_view = FakeView("create", {"create": "booking"})
+        free_view = FakeView("list", {"create": "booking"})
+
+        throttle = make_throttle(ActionScopedRateThrottle, 1000)
+        throttle.THROTTLE_RATES = {"booking": "1/hour"}
+        self.assertTrue(throttle.allow_request(self.request, booking_view))
+        self.assertFalse(throttle.allow_request(self.request, booking_view))
+        self.assertTrue(throttle.allow_request(self.request, free_view))
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "requires PostgreSQL")
+class ConcurrentThrottleTests(TransactionTestCase):
+    threads = 8
+    requests = 20
+
+    def test_no_request_is_lost(self):
+        request = APIRequestFactory().get("/")
+        request.user = get_user_model().objects.create_user("test@test.com", "test")
+        results = []
+        barrier = threading.Barrier(self.threads)
+
+        def send():
+            barrier.wait(timeout=10)
+            try:
+                for _ in range(self.requests):
+                    throttle = make_throttle(UserSlidingRateThrottle, 1000, "100/min")
+                    results.append(throttle.allow_request(request, FakeView()))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=send) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(results.count(True), 100)
+        self.assertEqual(RateCounter.objects.get().current, 100)
@@ -0,0 +1,142 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order, Ticket
+from airport.tests.tests_flight_api import sample_flight
+from airport.tests.tests_order_api import ORDER_URL
+from airport.tests.tests_search_cache import SEARCH_CACHES
+from airport.tests.tests_sparse_fields import model_queries
+
+TRIPS_URL = reverse("airport:order-trips")
+
+TRIPS_CACHES = {
+    **SEARCH_CACHES,
+    "trips": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "trips-tests",
+    },
+}
+
+
+def departing_in(**delta):
+    departure = timezone.now() + datetime.timedelta(**delta)
+    return {
+        "departure_time": departure,
+        "arrival_time": departure + datetime.timedelta(hours=2),
+    }
+
+
+@override_settings(CACHES=TRIPS_CACHES)
+class TripSummaryTests(TestCase):
+    def setUp(self):
+        caches["trips"].clear()
+        self.user = get_user_model().objects.create_user("test@test.com", "test1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.later = sample_flight(**departing_in(days=10))
+        self.sooner = sample_flight(**departing_in(days=2))
+        self.departed = sample_flight(**departing_in(days=-2))
+
+    def book(self, flight, *seats, user=None):
+        order = Order.objects.create(user=user or self.user)
+        for seat in seats:
+            Ticket.objects.create(row=1, seat=seat, flight=flight, order=order)
+        return order
+
+    def get_trips(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(TRIPS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, model_queries(context)
+
+    def test_auth_required(self):
+        res = APIClient().get(TRIPS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_upcoming_flights_with_two_queries(self):
+        self.book(self.later, 1, 2)
+        self.book(self.later, 3)
+        self.book(self.sooner, 1)
+        self.book(self.departed, 1)
+        self.book(self.sooner, 2, user=get_user_model().objects.create_user("o@o.o"))
+
+        res, queries = self.get_trips()
+
+        # Ticket counts, then the flights
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(res.data["flights"], 2)
+        self.assertEqual(res.data["seats"], 4)
+        self.assertEqual(res.data["next_departure"], self.sooner.departure_time)
+        self.assertEqual(
+            [
+                (trip["flight"], trip["seats"], trip["orders"])
+                for trip in res.data["trips"]
+            ],
+            [(self.sooner.id, 1, 1), (self.later.id, 3, 2)],
+        )
+
+    def test_without_upcoming_flights(self):
+        self.book(self.departed, 1)
+
+        res, _ = self.get_trips()
+
+        self.assertEqual(
+            res.data, {"next_departure": None, "flights": 0, "seats": 0, "trips": []}
+        )
+
+    def test_cached_until_the_user_orders(self):
+        self.book(self.sooner, 1)
+        self.get_trips()
+
+        res, queries = self.get_trips()
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("airport_ticket", queries[0])
+        self.assertEqual(res.data["seats"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                ORDER_URL,
+                {"tickets": [{"flight": self.later.id, "row": 1, "seat": 1}]},
+                format="json",
+            )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res, queries = self.get_trips()
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(res.data["flights"], 2)
+
+    def test_departed_flights_are_dropped_from_the_cache(self):
+        self.book(self.sooner, 1)
+        self.get_trips()
+
+        res, queries = self.get_trips_at(timezone.now() + datetime.timedelta(days=3))
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(res.data["trips"], [])
+
+    def test_flight_changes_are_not_cached(self):
+        self.book(self.sooner, 1)
+        self.get_trips()
+
+        self.sooner.status = Flight.Status.DELAYED
+        self.sooner.delay_minutes = 30
+        self.sooner.save()
+
+        res, _ = self.get_trips()
+        self.assertEqual(res.data["trips"][0]["status"], "delayed")
+        self.assertEqual(res.data["trips"][0]["delay_minutes"], 30)
+
+    def get_trips_at(self, now):
+        with mock.patch("airport.trips.timezone.now", return_value=now):
+            return self.get_trips()
@@ -0,0 +1,139 @@
+from django.db import connection
+from rest_framework.throttling import SimpleRateThrottle
+
+from airport.models import RateCounter
+
+# Counts the request unless the weighted counters before it reach the
+# limit, all in one statement so concurrent workers never lose a count.
+# SET expressions read the counters as they were before the update.
+COUNT_REQUEST_SQL = """
+INSERT INTO {table} AS counter
+    (key, period, current, previous, allowed, expires)
+VALUES (%(key)s, %(period)s, %(first)s, 0, %(first_allowed)s, %(expires)s)
+ON CONFLICT (key) DO UPDATE SET
+    period = excluded.period,
+    previous = {previous},
+    current = {current} + CASE WHEN {allowed} THEN 1 ELSE 0 END,
+    allowed = {allowed},
+    expires = excluded.expires
+RETURNING current, previous, allowed
+"""
+CURRENT = "CASE WHEN counter.period = excluded.period THEN counter.current ELSE 0 END"
+PREVIOUS = (
+    "CASE WHEN counter.period = excluded.period THEN counter.previous "
+    "WHEN counter.period = excluded.period - 1 THEN counter.current ELSE 0 END"
+)
+ALLOWED = f"({PREVIOUS}) * %(weight)s + ({CURRENT}) < %(limit)s"
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window counter throttle.
+
+    Instead of the per-request timestamp history kept by DRF throttles,
+    every client has one RateCounter row with two integer counters
+    (current and previous window), so memory per client is constant
+    and all workers enforce the same limit. Each request is counted
+    with one atomic upsert.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        weight = 1 - elapsed / self.duration
+        current, previous, allowed = self.count_request(window, weight)
+        if allowed:
+            return True
+
+        if current < self.num_requests and previous:
+            free_at = self.duration * (1 - (self.num_requests - current) / previous)
+            self.wait_seconds = free_at - elapsed
+        else:
+            self.wait_seconds = self.duration - elapsed
+        return False
+
+    def count_request(self, window, weight):
+        """Returns (current, previous, allowed) after counting the request"""
+        first_allowed = self.num_requests > 0
+        sql = COUNT_REQUEST_SQL.format(
+            table=connection.ops.quote_name(RateCounter._meta.db_table),
+            current=CURRENT,
+            previous=PREVIOUS,
+            allowed=ALLOWED,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                {
+                    "key": self.key,
+                    "period": window,
+                    "first": int(first_allowed),
+                    "first_allowed": first_allowed,
+                    "expires": (window + 2) * self.duration,
+                    "weight": weight,
+                    "limit": self.num_requests,
+                },
+            )
+            current, previous, allowed = cursor.fetchone()
+        return current, previous, bool(allowed)
+
+    def wait(self):
+        return max(self.wait_seconds, 0)
+
+
+class AnonSlidingRateThrottle(SlidingWindowRateThrottle):
+    """Limits the rate of API calls that may be made by anonymous users"""
+
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UserSlidingRateThrottle(SlidingWindowRateThrottle):
+    """Limits the rate of API calls that may be made by a given user"""
+
+    scope = "user"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class ActionScopedRateThrottle(UserSlidingRateThrottle):
+    """
+    Limits the rate of a single view action using the scope set in
+    the view's `throttle_scopes` mapping, ex. {"create": "booking"}
+    """
+
+    scope_attr = "throttle_scopes"
+
+    def allow_request(self, request, view):
+        scopes = getattr(view, self.scope_attr, {})
+        self.scope = scopes.get(getattr(view, "action", None))
+
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
@@ -0,0 +1,102 @@
+"""
+Upcoming trips of a user, read with two small queries.
+
+The user's tickets of flights that have not departed yet are counted
+by flight from the order and ticket indexes alone. These counts are
+cached per user in the "trips" cache and dropped when the user's
+orders change. Flights are read by id on every request, so their
+status, delay and departure are current, and flights departed since
+the counts were cached are left out.
+"""
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+
+from airport.models import Flight, Ticket
+
+
+def get_cache():
+    return caches["trips"]
+
+
+def trips_key(user_id):
+    return f"trips:{user_id}"
+
+
+def upcoming_trips(user_id, now=None):
+    """Seats and orders of the user's tickets by upcoming flight"""
+    now = now or timezone.now()
+    return (
+        Ticket.objects.filter(order__user_id=user_id, flight_departure__gte=now)
+        .values("flight_id")
+        .annotate(
+            seats=Count("id"),
+            orders=Count("order_id", distinct=True),
+        )
+        .order_by()
+    )
+
+
+def get_counts(user_id):
+    """{flight id: (seats, orders)} of the user, from the cache when possible"""
+    cache = get_cache()
+    key = trips_key(user_id)
+    counts = cache.get(key)
+    if counts is None:
+        counts = {
+            row["flight_id"]: (row["seats"], row["orders"])
+            for row in upcoming_trips(user_id)
+        }
+        cache.set(key, counts)
+    return counts
+
+
+def summarize(trips):
+    return {
+        "next_departure": trips[0]["departure_time"] if trips else None,
+        "flights": len(trips),
+        "seats": sum(trip["seats"] for trip in trips),
+        "trips": trips,
+    }
+
+
+def get_summary(user_id):
+    """The user's upcoming flights, next departure first"""
+    counts = get_counts(user_id)
+    if not counts:
+        return summarize([])
+
+    flights = (
+        Flight.objects.filter(pk__in=counts, departure_time__gte=timezone.now())
+        .values(
+            "id",
+            "departure_time",
+            "arrival_time",
+            "status",
+            "delay_minutes",
+            "route__source__name",
+            "route__destination__name",
+        )
+        .order_by("departure_time", "id")
+    )
+    trips = []
+    for flight in flights:
+        seats, orders = counts[flight["id"]]
+        trips.append(
+            {
+                "flight": flight["id"],
+                "source": flight["route__source__name"],
+                "destination": flight["route__destination__name"],
+                "departure_time": flight["departure_time"],
+                "arrival_time": flight["arrival_time"],
+                "status": flight["status"],
+                "delay_minutes": flight["delay_minutes"],
+                "seats": seats,
+                "orders": orders,
+            }
+        )
+    return summarize(trips)
+
+
+def orders_changed(user_id):
+    get_cache().delete(trips_key(user_id))
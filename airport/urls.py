@@ -10,6 +10,7 @@ from airport.views import (
     CrewViewSet,
     OrderViewSet,
     FlightViewSet,
+    FlightScheduleViewSet,
     RouteViewSet,
 )
 
@@ -24,6 +25,7 @@ router.register("airplanes", AirplaneViewSet)
 router.register("crews", CrewViewSet)
 router.register("orders", OrderViewSet)
 router.register("flights", FlightViewSet)
+router.register("schedules", FlightScheduleViewSet)
 router.register("routes", RouteViewSet)
 
 
@@ -1,12 +1,22 @@
+import math
 from datetime import datetime
 
-from django.db.models import F, Count
-from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, F, Max, Prefetch, prefetch_related_objects
+from django.db.models.functions import Greatest
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
 
 from airport.models import (
     Country,
@@ -16,8 +26,12 @@ from airport.models import (
     Airplane,
     Crew,
     Order,
+    OrderArchive,
     Flight,
+    FlightArchive,
+    FlightSchedule,
     Route,
+    Ticket,
 )
 from airport.serializers import (
     CountrySerializer,
@@ -38,19 +52,298 @@ from airport.serializers import (
     AirplaneListSerializer,
     AirplaneDetailSerializer,
     FlightListSerializer,
+    FlightListValuesSerializer,
     FlightDetailSerializer,
+    FlightScheduleSerializer,
     OrderListSerializer,
     AirplaneImageSerializer,
+    BulkListSerializer,
+    SeatRequestSerializer,
+    params_to_names,
 )
+from airport import flight_status, schedules, search_cache, trips
+from airport.renderers import EventStreamRenderer
+from airport.schema import OpenApiTypes, OpenApiParameter, extend_schema
+from airport.throttling import ActionScopedRateThrottle
+
+
+class SparseFieldsetMixin:
+    """
+    Narrows the queryset to the fields left in the serializer by
+    `?fields=` / `?expand=`: only requested columns are loaded and
+    related objects are joined or prefetched only when rendered.
+    Relations needed by a field are declared in `sparse_select_related`
+    and `sparse_prefetch_related` mappings keyed by the field name.
+    """
+
+    sparse_select_related = {}
+    sparse_prefetch_related = {}
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
+
+    def narrow_queryset(self, queryset):
+        query_params = self.request.query_params
+        if self.request.method != "GET" or (
+            params_to_names(query_params.get("fields")) is None
+            and params_to_names(query_params.get("expand")) is None
+        ):
+            return queryset
+
+        model = queryset.model
+        only_fields = {model._meta.pk.name}
+        select_related = set()
+        prefetch_related = set()
+
+        for name, field in self.get_serializer().fields.items():
+            root = field.source.split(".")[0]
+
+            if isinstance(field, ManyRelatedField) and isinstance(
+                field.child_relation, PrimaryKeyRelatedField
+            ):
+                prefetch_related.add(root)
+            elif not isinstance(field, PrimaryKeyRelatedField):
+                select_related.update(self.sparse_select_related.get(name, ()))
+                prefetch_related.update(self.sparse_prefetch_related.get(name, ()))
+
+            if only_fields is None or root in queryset.query.annotations:
+                continue
+            try:
+                model_field = model._meta.get_field(root)
+            except FieldDoesNotExist:
+                # Properties may depend on any column
+                only_fields = None
+                continue
+            if model_field.concrete:
+                only_fields.add(root)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_related:
+            queryset = queryset.select_related(*sorted(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(prefetch_related))
+        if only_fields is not None:
+            queryset = queryset.only(*only_fields)
+        return queryset
+
+
+class ArchivedRetrieveMixin:
+    """
+    Serves objects moved out of the live table by `archive_flights`:
+    when retrieve finds nothing, the stored snapshot from
+    `archive_model` is returned as is (pruned by `?fields=`).
+    """
+
+    archive_model = None
 
+    def get_archive_queryset(self):
+        return self.archive_model.objects.all()
 
-class CountryViewSet(viewsets.ModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            archived = get_object_or_404(
+                self.get_archive_queryset(), pk=self.kwargs[lookup_url_kwarg]
+            )
+        return Response(self.get_archived_data(archived))
+
+    def get_archived_data(self, archived):
+        data = archived.data
+        fields = params_to_names(self.request.query_params.get("fields"))
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name in fields}
+        return data
+
+    def get_batch_missing(self, ids):
+        archived = self.get_archive_queryset().in_bulk(ids)
+        return {pk: self.get_archived_data(item) for pk, item in archived.items()}
+
+
+class ConditionalGetMixin:
+    """
+    Answers list and retrieve with 304 Not Modified when the client's
+    copy is current, checked with one aggregate query before anything
+    is serialized: the number of objects and the latest `updated_at`
+    of them and of the related objects in `last_modified_fields` they
+    are rendered with. Lists only get an ETag, deleting an object
+    would not change their Last-Modified.
+    """
+
+    last_modified_fields = ("updated_at",)
+    validators = None
+    validator_headers = None
+
+    def get_validators(self, queryset):
+        fields = self.last_modified_fields
+        latest = Greatest(*fields) if len(fields) > 1 else F(fields[0])
+        return queryset.order_by().aggregate(count=Count("pk"), latest=Max(latest))
+
+    def get_not_modified(self, queryset, detail=False):
+        """304 Not Modified or 412 Precondition Failed, None otherwise"""
+        validators = self.validators = self.get_validators(queryset)
+        if not validators["count"]:
+            return None
+
+        latest = validators["latest"]
+        etag = quote_etag(f"{validators['count']}-{latest.timestamp():.6f}")
+        self.validator_headers = {"ETag": etag}
+        last_modified = None
+        if detail:
+            last_modified = int(latest.timestamp())
+            self.validator_headers["Last-Modified"] = http_date(last_modified)
+
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            for name, value in self.validator_headers.items():
+                response[name] = value
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.validator_headers and response.status_code == status.HTTP_200_OK:
+            for name, value in self.validator_headers.items():
+                response.setdefault(name, value)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        not_modified = self.get_not_modified(self.filter_queryset(self.get_queryset()))
+        if not_modified is not None:
+            return not_modified
+        return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+            not_modified = self.get_not_modified(queryset, detail=True)
+        except (TypeError, ValueError, DjangoValidationError):
+            # Malformed ids are answered by retrieve
+            not_modified = None
+        if not_modified is not None:
+            return not_modified
+        return super().retrieve(request, *args, **kwargs)
+
+
+class BatchRetrieveMixin:
+    """
+    `batch/?ids=1,2,3` returns the objects as retrieve would, in one
+    response and in the order of the ids. They are read with a single
+    query of the retrieve queryset (and one per prefetched relation);
+    ids that do not exist are left out. At most `batch_max_size` ids
+    are accepted.
+    """
+
+    batch_max_size = 100
+
+    @staticmethod
+    def _params_to_ints(query_string):
+        """Converts a list of string IDs to a list of integers"""
+        return [int(str_id) for str_id in query_string.split(",")]
+
+    def get_batch_ids(self):
+        value = self.request.query_params.get("ids")
+        if not value:
+            raise ValidationError({"ids": "ids of the objects are required"})
+        try:
+            ids = list(dict.fromkeys(self._params_to_ints(value)))
+        except ValueError:
+            raise ValidationError({"ids": "ids must be integers"})
+        if len(ids) > self.batch_max_size:
+            raise ValidationError(
+                {"ids": f"at most {self.batch_max_size} ids are allowed"}
+            )
+        return ids
+
+    def get_batch_objects(self, ids):
+        return self.filter_queryset(self.get_queryset()).in_bulk(ids)
+
+    def get_batch_missing(self, ids):
+        """Representations of the ids not found in the queryset"""
+        return {}
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type={"type": "list", "items": {"type": "number"}},
+                description="Ids of the objects (ex. ?ids=2,3)",
+            )
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def batch(self, request):
+        ids = self.get_batch_ids()
+        objects = self.get_batch_objects(ids)
+        found = [objects[pk] for pk in ids if pk in objects]
+        data = dict(
+            zip(
+                [item.pk for item in found],
+                self.get_serializer(found, many=True).data,
+            )
+        )
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            data.update(self.get_batch_missing(missing))
+        return Response([data[pk] for pk in ids if pk in data])
+
+
+class BulkWriteMixin:
+    """
+    `bulk/` creates (POST) or updates (PATCH) a list of objects in one
+    request and one transaction, see BulkListSerializer. Items to update
+    are identified by their "id". At most `bulk_max_size` items are
+    accepted.
+    """
+
+    bulk_max_size = 10000
+
+    def get_bulk_serializer(self, *args, partial=False, **kwargs):
+        context = self.get_serializer_context()
+        child = self.get_serializer_class()(partial=partial, context=context)
+        return BulkListSerializer(
+            *args,
+            child=child,
+            partial=partial,
+            context=context,
+            max_length=self.bulk_max_size,
+            **kwargs,
+        )
+
+    @action(methods=["POST", "PATCH"], detail=False)
+    def bulk(self, request):
+        if request.method == "POST":
+            serializer = self.get_bulk_serializer(data=request.data)
+            response_status = status.HTTP_201_CREATED
+        else:
+            serializer = self.get_bulk_serializer(
+                self.get_queryset(), data=request.data, partial=True
+            )
+            response_status = status.HTTP_200_OK
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(serializer.data, status=response_status)
+
+
+class CountryViewSet(
+    BulkWriteMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = Country.objects.all()
     serializer_class = CountrySerializer
 
 
-class CityViewSet(viewsets.ModelViewSet):
+class CityViewSet(
+    BulkWriteMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = City.objects.all()
+    sparse_select_related = {"country": ["country"]}
+    last_modified_fields = ("updated_at", "country__updated_at")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -66,35 +359,157 @@ class CityViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(
+    BatchRetrieveMixin,
+    BulkWriteMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Airport.objects.all()
+    sparse_select_related = {"closest_big_city": ["closest_big_city__country"]}
+    last_modified_fields = (
+        "updated_at",
+        "closest_big_city__updated_at",
+        "closest_big_city__country__updated_at",
+    )
+    # Km, wider searches would list most airports
+    nearby_max_radius = 2000
 
     def get_serializer_class(self):
         if self.action == "list":
             return AirportListSerializer
-        if self.action == "retrieve":
+        if self.action in ("retrieve", "batch"):
             return AirportDetailSerializer
         return AirportSerializer
 
     def get_queryset(self):
         queryset = self.queryset
-        if self.action in ("list", "retrieve"):
+        if self.action in ("list", "retrieve", "batch"):
             return queryset.select_related()
         return queryset
 
+    @staticmethod
+    def _param_to_float(request, name):
+        value = request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            number = math.nan
+        if not math.isfinite(number):
+            raise ValidationError({name: "must be a number"})
+        return number
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="airport",
+                type=OpenApiTypes.INT,
+                description="Search around this airport (ex. ?airport=3)",
+            ),
+            OpenApiParameter(
+                name="lat",
+                type=OpenApiTypes.FLOAT,
+                description="Latitude of the point to search around",
+            ),
+            OpenApiParameter(
+                name="lon",
+                type=OpenApiTypes.FLOAT,
+                description="Longitude of the point to search around",
+            ),
+            OpenApiParameter(
+                name="radius",
+                type=OpenApiTypes.FLOAT,
+                description="All airports within this many km, up to 2000 (ex. ?radius=300)",
+            ),
+            OpenApiParameter(
+                name="count",
+                type=OpenApiTypes.INT,
+                description="Number of nearest airports without radius (default 5)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=False)
+    def nearby(self, request):
+        """
+        Airports within `radius` km, or the `count` nearest ones, of a
+        point or another airport, nearest first with their distance
+        """
+        # NumPy is imported on first use to keep worker startup fast
+        from airport import geo
+
+        exclude = ()
+        airport_id = request.query_params.get("airport")
+        if airport_id is not None:
+            origin = get_object_or_404(Airport, pk=airport_id)
+            if not origin.has_coordinates:
+                raise ValidationError({"airport": "airport has no coordinates"})
+            latitude, longitude = origin.latitude, origin.longitude
+            exclude = (origin.id,)
+        else:
+            latitude = self._param_to_float(request, "lat")
+            longitude = self._param_to_float(request, "lon")
+            if latitude is None or longitude is None:
+                raise ValidationError("Give an airport or lat and lon")
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValidationError("lat or lon out of range")
+
+        index = geo.get_index()
+        radius = self._param_to_float(request, "radius")
+        if radius is not None:
+            if not 0 < radius <= self.nearby_max_radius:
+                raise ValidationError(
+                    {
+                        "radius": "radius must be in range: "
+                        f"(0, {self.nearby_max_radius}]"
+                    }
+                )
+            found = [
+                (found_id, distance)
+                for found_id, distance in index.within(latitude, longitude, radius)
+                if found_id not in exclude
+            ]
+        else:
+            try:
+                count = int(request.query_params.get("count", 5))
+            except ValueError:
+                count = 0
+            if not 1 <= count <= 100:
+                raise ValidationError({"count": "count must be in range: (1, 100)"})
+            found = index.nearest(latitude, longitude, count, exclude=exclude)
+
+        airports = Airport.objects.select_related("closest_big_city").in_bulk(
+            [found_id for found_id, _ in found]
+        )
+        data = []
+        for found_id, distance in found:
+            if found_id in airports:
+                item = AirportListSerializer(airports[found_id]).data
+                item["distance"] = round(distance, 1)
+                data.append(item)
+        return Response(data)
+
+
+class AirplaneTypeViewSet(
+    ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
+class AirplaneViewSet(
+    BatchRetrieveMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = Airplane.objects.all()
+    sparse_select_related = {"airplane_type": ["airplane_type"]}
+    last_modified_fields = ("updated_at", "airplane_type__updated_at")
 
     def get_serializer_class(self):
         if self.action == "list":
             return AirplaneListSerializer
-        elif self.action == "retrieve":
+        elif self.action in ("retrieve", "batch"):
             return AirplaneDetailSerializer
         elif self.action == "upload_image":
             return AirplaneImageSerializer
@@ -102,7 +517,7 @@ class AirplaneViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = self.queryset
-        if self.action in ("list", "retrieve"):
+        if self.action in ("list", "retrieve", "batch"):
             return queryset.select_related()
         return queryset
 
@@ -122,22 +537,37 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+class CrewViewSet(
+    BulkWriteMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(
+    ArchivedRetrieveMixin, SparseFieldsetMixin, viewsets.ModelViewSet
+):
     queryset = Order.objects
+    archive_model = OrderArchive
     permission_classes = (IsAuthenticated,)
+    throttle_scopes = {"create": "booking", "assign_seats": "booking"}
+    sparse_prefetch_related = {
+        "tickets": [
+            "tickets__flight__airplane",
+            "tickets__flight__route__source",
+            "tickets__flight__route__destination",
+        ]
+    }
 
     def get_serializer_class(self):
         if self.action == "list":
             return OrderListSerializer
+        if self.action == "assign_seats":
+            return SeatRequestSerializer
         return OrderSerializer
 
     def get_queryset(self):
-        queryset = self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user_id=self.request.user.id)
 
         if self.action == "list":
             queryset = queryset.prefetch_related(
@@ -146,11 +576,41 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def get_archive_queryset(self):
+        return OrderArchive.objects.filter(user_id=self.request.user.id)
+
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # Token users are not model instances
+        serializer.save(user_id=self.request.user.id)
 
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="assign-seats",
+    )
+    def assign_seats(self, request):
+        """Books `count` seats on a flight chosen by the server"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user_id=request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class FlightViewSet(viewsets.ModelViewSet):
+    @action(
+        methods=["GET"],
+        detail=False,
+    )
+    def trips(self, request):
+        """Upcoming flights of the user's orders, next departure first"""
+        return Response(trips.get_summary(request.user.id))
+
+
+class FlightViewSet(
+    ArchivedRetrieveMixin,
+    BatchRetrieveMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = (
         Flight.objects.all()
         .select_related(
@@ -158,34 +618,65 @@ class FlightViewSet(viewsets.ModelViewSet):
         )
         .prefetch_related("crew")
     )
+    archive_model = FlightArchive
+    throttle_scopes = {
+        "list": "search",
+        "batch": "search",
+        "adjacent_seats": "search",
+        "suggest_seats": "search",
+        "current_status": "status",
+        "status_stream": "status",
+    }
+    # Searches with more results are not cached
+    search_cache_max_size = 1000
+    sparse_select_related = {
+        "route": ["route__source", "route__destination"],
+        "rout_source": ["route__source"],
+        "rout_destination": ["route__destination"],
+        "airplane": ["airplane__airplane_type"],
+        "airplane_image": ["airplane"],
+    }
+    sparse_prefetch_related = {"crew": ["crew"]}
+    # Tickets and crew members touch their flight when they change
+    last_modified_fields = (
+        "updated_at",
+        "route__updated_at",
+        "route__source__updated_at",
+        "route__destination__updated_at",
+        "airplane__updated_at",
+        "airplane__airplane_type__updated_at",
+    )
 
-    @staticmethod
-    def _params_to_ints(query_string):
-        """Converts a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in query_string.split(",")]
+    def get_search_params(self):
+        """Filter parameters in a canonical form, used as the cache key"""
+        params = {}
+        for name in ("airplanes", "source", "destination"):
+            value = self.request.query_params.get(name)
+            if value:
+                params[name] = sorted(set(self._params_to_ints(value)))
 
-    def get_queryset(self):
-        airplanes = self.request.query_params.get("airplanes")
-        source = self.request.query_params.get("source")
-        destination = self.request.query_params.get("destination")
         date = self.request.query_params.get("departure_time")
+        if date:
+            params["departure_time"] = datetime.strptime(date, "%Y-%m-%d").date()
+        return params
 
+    def get_queryset(self):
+        params = self.get_search_params()
         queryset = self.queryset
 
-        if airplanes:
-            airplanes_id = self._params_to_ints(airplanes)
-            queryset = queryset.filter(airplane__id__in=airplanes_id)
+        if "airplanes" in params:
+            queryset = queryset.filter(airplane__id__in=params["airplanes"])
 
-        if source:
-            source_id = self._params_to_ints(source)
-            queryset = queryset.filter(route__source_id__in=source_id)
+        if "source" in params:
+            queryset = queryset.filter(route__source_id__in=params["source"])
 
-        if destination:
-            destination_id = self._params_to_ints(destination)
-            queryset = queryset.filter(route__destination__id__in=destination_id)
+        if "destination" in params:
+            queryset = queryset.filter(
+                route__destination__id__in=params["destination"]
+            )
 
-        if date:
-            departure_date = datetime.strptime(date, "%Y-%m-%d")
+        if "departure_time" in params:
+            departure_date = params["departure_time"]
             queryset = queryset.filter(
                 departure_time__year=departure_date.year,
                 departure_time__month=departure_date.month,
@@ -193,17 +684,48 @@ class FlightViewSet(viewsets.ModelViewSet):
             )
 
         if self.action == "list":
-            queryset = queryset.annotate(
-                tickets_available=F("airplane__rows") * F("airplane__seats_in_row")
-                - Count("tickets")
-            )
+            queryset = queryset.with_tickets_available()
 
-        return queryset.distinct()
+        return queryset
+
+    def get_object(self):
+        flight = super().get_object()
+        if self.action == "retrieve":
+            self.prefetch_taken_tickets([flight])
+        return flight
+
+    def get_batch_objects(self, ids):
+        flights = super().get_batch_objects(ids)
+        self.prefetch_taken_tickets(list(flights.values()))
+        return flights
+
+    def prefetch_taken_tickets(self, flights):
+        if not flights or "taken_tickets" not in self.get_serializer().fields:
+            return
+        tickets = Ticket.objects.all()
+        if all("departure_time" in flight.__dict__ for flight in flights):
+            # Lets PostgreSQL read only the ticket partitions of the flights
+            tickets = tickets.filter(
+                flight_departure__in={flight.departure_time for flight in flights}
+            )
+        prefetch_related_objects(flights, Prefetch("tickets", queryset=tickets))
+
+    def get_scheduled_flights(self):
+        """Unsaved flights of schedules departing on the searched date"""
+        params = self.get_search_params()
+        if "departure_time" not in params:
+            return []
+        return schedules.scheduled_flights(
+            params["departure_time"],
+            airplanes=params.get("airplanes"),
+            source=params.get("source"),
+            destination=params.get("destination"),
+        )
 
     def get_serializer_class(self):
         if self.action == "list":
             return FlightListSerializer
-        if self.action == "retrieve":
+        if self.action in ("retrieve", "batch"):
             return FlightDetailSerializer
         return FlightSerializer
 
@@ -232,21 +754,213 @@ class FlightViewSet(viewsets.ModelViewSet):
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        size = None
+        if "departure_time" not in self.get_search_params():
+            # Date searches list departures of schedules too
+            not_modified = self.get_not_modified(
+                self.filter_queryset(self.get_queryset())
+            )
+            if not_modified is not None:
+                return not_modified
+            size = self.validators["count"]
 
+        serializer = FlightListValuesSerializer(
+            fields=params_to_names(request.query_params.get("fields"))
+        )
+        key = search_cache.search_key(self.get_search_params())
+
+        cached = search_cache.get_results(key)
+        if cached is not None:
+            stored_at, results = cached
+            page = self.paginate_queryset(results)
+            shown = results if page is None else page
+            if search_cache.is_fresh(stored_at, [flight_id for flight_id, _ in shown]):
+                return self.search_response(serializer, shown, page is not None)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        scheduled = self.get_scheduled_flights()
+        if scheduled:
+            # Searches of a single day, listed without caching
+            rows = serializer.get_rows_with_scheduled(queryset, scheduled)
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return self.get_paginated_response(serializer.to_representation(page))
+            return Response(serializer.to_representation(rows))
+
+        if size is None:
+            # Counted without the seats, which are computed for each row
+            size = queryset.values("pk")[: self.search_cache_max_size + 1].count()
+        if size > self.search_cache_max_size:
+            # Too broad to cache, paginate in the database instead
+            rows = serializer.get_rows(queryset)
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return self.get_paginated_response(serializer.to_representation(page))
+            return Response(serializer.to_representation(rows))
+
+        results = list(
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values_list("id", "tickets_available")
+        )
+        search_cache.set_results(key, results)
+        page = self.paginate_queryset(results)
+        shown = results if page is None else page
+        return self.search_response(serializer, shown, page is not None)
 
-class RouteViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="count",
+                type=OpenApiTypes.INT,
+                description="Number of adjacent free seats (ex. ?count=4)",
+            )
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="adjacent-seats",
+    )
+    def adjacent_seats(self, request, pk=None):
+        """Lists every block of `count` free seats next to each other in a row"""
+        # NumPy is imported on first use to keep worker startup fast
+        from airport.seat_map import SeatMaps
+
+        flight = self.get_object()
+        try:
+            count = int(request.query_params.get("count", 1))
+        except ValueError:
+            count = 0
+        seats_in_row = flight.airplane.seats_in_row
+        if not 1 <= count <= seats_in_row:
+            return Response(
+                {"count": f"count must be in available range: (1, {seats_in_row})"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        blocks = SeatMaps.for_flight(flight.id).find_adjacent(flight.id, count)
+        return Response(
+            {
+                "count": count,
+                "blocks": [
+                    {"row": row, "seats": list(range(seat, seat + count))}
+                    for row, seat in blocks
+                ],
+            }
+        )
+
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="suggest-seats",
+    )
+    def suggest_seats(self, request, pk=None):
+        """
+        Previews the seats `orders/assign-seats/` would book for the
+        same `count`, `together`, `window` and `front` parameters
+        """
+        flight = self.get_object()
+        serializer = SeatRequestSerializer(
+            data={**request.query_params.dict(), "flight": flight.id}
+        )
+        serializer.is_valid(raise_exception=True)
+        seats = serializer.choose_seats(flight)
+        return Response({"seats": [{"row": row, "seat": seat} for row, seat in seats]})
+
+    def get_status(self, pk):
+        try:
+            status = flight_status.current_status(pk)
+        except (TypeError, ValueError):
+            status = None
+        if status is None:
+            raise Http404
+        return status
+
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="status",
+        # Watchers poll and reconnect all day, so no daily quota applies
+        throttle_classes=[ActionScopedRateThrottle],
+    )
+    def current_status(self, request, pk=None):
+        """Status, delay and departure time only, read with one query"""
+        return Response(flight_status.status_event(self.get_status(pk)))
+
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="status-stream",
+        throttle_classes=[ActionScopedRateThrottle],
+        renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES
+        + [EventStreamRenderer],
+    )
+    def status_stream(self, request, pk=None):
+        """
+        Server-sent events with the current status of the flight and each
+        change after it. Send `Last-Event-ID` to get the changes missed
+        since that event instead of the current status.
+        """
+        last_event_id = request.headers.get("Last-Event-ID")
+        if last_event_id is not None and not last_event_id.isdigit():
+            last_event_id = None
+
+        status = self.get_status(pk)
+        response = StreamingHttpResponse(
+            flight_status.stream(
+                status["id"],
+                status,
+                None if last_event_id is None else int(last_event_id),
+            ),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Stops nginx from buffering the events
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def search_response(self, serializer, results, paginated):
+        rows = serializer.get_rows_by_id(self.queryset, results)
+        data = serializer.to_representation(rows)
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class FlightScheduleViewSet(viewsets.ModelViewSet):
+    queryset = FlightSchedule.objects.prefetch_related("crew")
+    serializer_class = FlightScheduleSerializer
+
+
+class RouteViewSet(
+    BatchRetrieveMixin,
+    BulkWriteMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Route.objects.all()
+    sparse_select_related = {"source": ["source"], "destination": ["destination"]}
+    last_modified_fields = (
+        "updated_at",
+        "source__updated_at",
+        "destination__updated_at",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
             return RoutListSerializer
-        elif self.action == "retrieve":
+        elif self.action in ("retrieve", "batch"):
             return RoutDetailSerializer
         return RouteSerializer
 
     def get_queryset(self):
         queryset = self.queryset
-        if self.action in ("list", "retrieve"):
-            return queryset.select_related("source", "destination")
+        if self.action in ("list", "retrieve", "batch", "bulk"):
+            # Bulk updates compute distances from the airports
+            queryset = queryset.select_related("source", "destination")
+        ordering = self.request.query_params.get("ordering")
+        if self.action == "list" and ordering in ("distance", "-distance"):
+            queryset = queryset.order_by(ordering, "id")
         return queryset
@@ -0,0 +1,98 @@
+import mimetypes
+import os
+
+from django.utils.http import http_date, parse_http_date_safe
+
+BLOCK_SIZE = 64 * 1024
+
+
+class FilesApplication:
+    """
+    WSGI wrapper serving static and media files straight from disk.
+
+    Files under the given URL prefixes never reach Django: open files
+    are handed to the server's `wsgi.file_wrapper`, which gunicorn
+    sends with sendfile() (zero-copy) where the platform supports it.
+    """
+
+    def __init__(self, application, roots, max_age=3600):
+        self.application = application
+        self.max_age = max_age
+        self.roots = [
+            (prefix if prefix.startswith("/") else f"/{prefix}", os.path.realpath(root))
+            for prefix, root in roots.items()
+            if prefix and root
+        ]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "").encode("latin-1").decode("utf-8", "replace")
+
+        for prefix, root in self.roots:
+            if path.startswith(prefix):
+                return self.serve(environ, start_response, root, path[len(prefix) :])
+
+        return self.application(environ, start_response)
+
+    def serve(self, environ, start_response, root, relative_path):
+        if environ["REQUEST_METHOD"] not in ("GET", "HEAD"):
+            start_response("405 Method Not Allowed", [("Allow", "GET, HEAD")])
+            return [b""]
+
+        path = os.path.realpath(os.path.join(root, relative_path))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return [b"Not Found"]
+
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        headers = [
+            ("Last-Modified", http_date(stat.st_mtime)),
+            ("ETag", etag),
+            ("Cache-Control", f"public, max-age={self.max_age}"),
+        ]
+
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response("304 Not Modified", headers)
+            return [b""]
+
+        content_type, encoding = mimetypes.guess_type(path)
+        headers.append(("Content-Type", content_type or "application/octet-stream"))
+        if encoding:
+            headers.append(("Content-Encoding", encoding))
+        headers.append(("Content-Length", str(stat.st_size)))
+        start_response("200 OK", headers)
+
+        if environ["REQUEST_METHOD"] == "HEAD":
+            return [b""]
+
+        file = open(path, "rb")
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None:
+            return file_wrapper(file, BLOCK_SIZE)
+        return FileIterator(file)
+
+    @staticmethod
+    def not_modified(environ, etag, mtime):
+        if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            return etag in [
+                tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+            ]
+
+        if_modified_since = parse_http_date_safe(
+            environ.get("HTTP_IF_MODIFIED_SINCE", "")
+        )
+        return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+class FileIterator:
+    """Fallback for servers without wsgi.file_wrapper"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __iter__(self):
+        return iter(lambda: self.file.read(BLOCK_SIZE), b"")
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,129 @@
+import importlib.util
+import json
+import os
+import threading
+import time
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+
+def ping_database(alias=DEFAULT_DB_ALIAS):
+    """Opens a connection if needed and runs SELECT 1 on it"""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError:
+        # Drop the broken connection so the next probe reconnects
+        connection.close()
+        raise
+
+
+def migration_files():
+    """Returns (app_label, name) of migration files found on disk"""
+    migrations = set()
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except ModuleNotFoundError:
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+
+        for location in spec.submodule_search_locations:
+            for filename in os.listdir(location):
+                name, extension = os.path.splitext(filename)
+                if extension == ".py" and name[0] not in "_~":
+                    migrations.add((app_config.label, name))
+    return migrations
+
+
+def pending_migrations(alias=DEFAULT_DB_ALIAS):
+    """
+    Returns migration files not recorded as applied. Only lists
+    directories and reads django_migrations with a raw query,
+    the migration modules and graph are never loaded.
+    """
+    connection = connections[alias]
+    table = MigrationRecorder.Migration._meta.db_table
+
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return migration_files()
+        cursor.execute("SELECT app, name FROM %s" % connection.ops.quote_name(table))
+        applied = set(cursor.fetchall())
+
+    return migration_files() - applied
+
+
+class HealthCheckApplication:
+    """
+    WSGI wrapper answering load balancer probes before Django:
+    `/healthz` reports that the process is alive, `/readyz` checks
+    the database with SELECT 1 and that migrations are applied.
+    Probes skip middleware, ALLOWED_HOSTS and the ORM; readiness
+    results are reused for `cache_timeout` seconds.
+    """
+
+    def __init__(self, application, cache_timeout=1.0):
+        self.application = application
+        self.cache_timeout = cache_timeout
+        self.migrations_applied = False
+        self._checked_at = None
+        self._result = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "").rstrip("/")
+        if path == "/healthz":
+            return self.respond(start_response, True, {"status": "ok"})
+        if path == "/readyz":
+            return self.respond(start_response, *self.readiness())
+        return self.application(environ, start_response)
+
+    def readiness(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at > self.cache_timeout:
+                self._result = self.check()
+                self._checked_at = now
+            return self._result
+
+    def check(self):
+        checks = {"database": "ok", "migrations": "ok"}
+        try:
+            ping_database()
+            if not self.migrations_applied:
+                pending = pending_migrations()
+                self.migrations_applied = not pending
+                if pending:
+                    checks["migrations"] = f"{len(pending)} pending"
+        except DatabaseError:
+            checks["database"] = "unavailable"
+            checks["migrations"] = "unknown"
+        finally:
+            connections[DEFAULT_DB_ALIAS].close_if_unusable_or_obsolete()
+
+        ready = all(value == "ok" for value in checks.values())
+        checks["status"] = "ok" if ready else "unavailable"
+        return ready, checks
+
+    @staticmethod
+    def respond(start_response, ok, payload):
+        body = json.dumps(payload).encode()
+        start_response(
+            "200 OK" if ok else "503 Service Unavailable",
+            [
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                ("Cache-Control", "no-store"),
+            ],
+        )
+        return [body]
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Returns {coding: quality} parsed from an Accept-Encoding header"""
+    codings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses with brotli or gzip, whichever the client
+    prefers (brotli wins ties when installed). Responses smaller than
+    COMPRESSION_MIN_SIZE bytes are sent as is.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+        self.brotli_quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+
+    def get_encoding(self, request):
+        codings = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        available = ["br", "gzip"] if brotli is not None else ["gzip"]
+        wildcard = codings.get("*", 0.0)
+
+        best, best_quality = None, 0.0
+        for coding in available:
+            quality = codings.get(coding, wildcard)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    def compress(self, content, encoding):
+        if encoding == "br":
+            return brotli.compress(content, quality=self.brotli_quality)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            # A compressed stream is flushed only when the compressor's
+            # buffer fills, events would wait behind it
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        encoding = self.get_encoding(request)
+        if response.streaming:
+            # Streams are gzipped chunk by chunk by GZipMiddleware
+            if encoding == "gzip":
+                return super().process_response(request, response)
+            patch_vary_headers(response, ("Accept-Encoding",))
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if encoding is None:
+            return response
+
+        compressed_content = self.compress(response.content, encoding)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+
+        return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -23,10 +24,25 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get("SECRET_KEY")
 
+# Settings profile: "dev", "test" or "prod"
+PROFILE = os.environ.get(
+    "DJANGO_PROFILE",
+    "test" if sys.argv[1:2] == ["test"] else "dev",
+)
+
+if PROFILE not in ("dev", "test", "prod"):
+    raise ValueError(f"Unknown DJANGO_PROFILE: {PROFILE}")
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# With DEBUG every executed query is kept in connection.queries
+DEBUG = PROFILE == "dev"
 
-ALLOWED_HOSTS = []
+# API-only workers skip the admin, sessions and OpenAPI schema apps
+API_ONLY = os.environ.get("DJANGO_API_ONLY", "0") == "1"
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get("ALLOWED_HOSTS", "").split(",") if host
+]
 
 
 # Application definition
@@ -38,7 +54,6 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "debug_toolbar",
     "rest_framework",
     "drf_spectacular",
     "airport",
@@ -48,15 +63,34 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "airport_api_service.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
+if API_ONLY:
+    SKIPPED_APPS = (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "drf_spectacular",
+    )
+    SKIPPED_MIDDLEWARE = (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    )
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SKIPPED_APPS]
+    MIDDLEWARE = [item for item in MIDDLEWARE if item not in SKIPPED_MIDDLEWARE]
+
+if PROFILE == "dev" and not API_ONLY:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "airport_api_service.urls"
 
 MEDIA_ROOT = "/vol/web/media"
@@ -79,6 +113,19 @@ TEMPLATES = [
     },
 ]
 
+if PROFILE == "prod":
+    # Cached loaders parse every template once per process
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            [
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        ),
+    ]
+
 WSGI_APPLICATION = "airport_api_service.wsgi.application"
 
 
@@ -96,6 +143,50 @@ DATABASES = {
     }
 }
 
+if PROFILE == "prod":
+    # Reuse connections between requests instead of reconnecting
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("CONN_MAX_AGE", 60))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Flight search results. A single dev process keeps them in memory,
+    # production shares them between workers below
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "flight-search",
+        "TIMEOUT": 10,
+    },
+    # Ticket counts of each user's upcoming flights, dropped when the
+    # user orders, shared so that every worker sees the drop. Create
+    # the table with `manage.py createcachetable`
+    "trips": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "trips_cache",
+        "TIMEOUT": 300,
+    },
+}
+
+if PROFILE == "prod":
+    # Sold tickets invalidate the results of every worker, not only the
+    # one that sold them. Created by `manage.py createcachetable`
+    CACHES["search"] = {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "search_cache",
+        "TIMEOUT": 10,
+    }
+
+if PROFILE == "test":
+    # Tests share the process, results cached by one would leak into another
+    CACHES["search"]["BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+    CACHES["trips"]["BACKEND"] = "django.core.cache.backends.dummy.DummyCache"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -115,6 +206,9 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+if PROFILE == "test":
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
 AUTH_USER_MODEL = "user.User"
 
 
@@ -135,6 +229,8 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+STATIC_ROOT = os.environ.get("STATIC_ROOT", "/vol/web/static")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -142,23 +238,48 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 INTERNAL_IPS = ["127.0.0.1"]
 
+# Responses smaller than this are not compressed
+COMPRESSION_MIN_SIZE = 1024
+
+COMPRESSION_BROTLI_QUALITY = 4
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "airport.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "airport.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_PERMISSION_CLASSES": [
         "airport.permissions.IsAdminAllOrIsAuthenticatedReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication",
     ],
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "airport.throttling.AnonSlidingRateThrottle",
+        "airport.throttling.UserSlidingRateThrottle",
+        "airport.throttling.ActionScopedRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/day", "user": "50/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "10/day",
+        "user": "50/day",
+        "booking": "10/hour",
+        "search": "30/min",
+        "status": "60/min",
+    },
 }
 
+if API_ONLY:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = ["airport.renderers.FastJSONRenderer"]
+else:
+    REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = "drf_spectacular.openapi.AutoSchema"
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Airport Service API",
     "DESCRIPTION": "Order tickets for your airplane trip",
@@ -176,4 +297,31 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": False,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.ClaimsTokenObtainPairSerializer",
+}
+
+# Seconds a booking waits for the flight lock before giving up
+BOOKING_LOCK_TIMEOUT = 5
+
+# Flight status event streams, times in seconds (RETRY in milliseconds)
+FLIGHT_STATUS_STREAM = {
+    # Open streams share one query per interval and process, each connect
+    # also runs the throttle, status and missed changes queries
+    "POLL_INTERVAL": 1.0,
+    "HEARTBEAT": 15,
+    # Clients reconnect afterwards. gthread workers keep notifying the
+    # gunicorn arbiter while a thread streams, so long streams are fine.
+    "STREAM_TIMEOUT": 3600,
+    "RETRY": 2000,
+    # How long ids skipped by a poll are looked for again
+    "GAP_TIMEOUT": 10,
+}
+
+# Seconds an in-memory airport index is used before it is rebuilt
+GEO_INDEX_TIMEOUT = 300
+
+# Full user objects loaded for token users (0 disables the cache)
+USER_CACHE = {
+    "MAX_SIZE": 1024,
+    "TIMEOUT": 30,
 }
@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from airport_api_service.files import FilesApplication
+from airport_api_service.health import HealthCheckApplication
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "airport_api_service.settings")
 
-application = get_wsgi_application()
+application = HealthCheckApplication(
+    FilesApplication(
+        get_wsgi_application(),
+        {
+            settings.STATIC_URL: settings.STATIC_ROOT,
+            settings.MEDIA_URL: settings.MEDIA_ROOT,
+        },
+    )
+)
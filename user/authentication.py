@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.models import TokenUser
+
+
+class UserCache:
+    """Thread-safe LRU cache of full user objects with a short TTL."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user):
+        if not self.max_size or not self.timeout:
+            return
+        with self._lock:
+            self._users[user.pk] = (user, time.monotonic() + self.timeout)
+            self._users.move_to_end(user.pk)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE.get("MAX_SIZE", 0),
+    timeout=settings.USER_CACHE.get("TIMEOUT", 0),
+)
+
+
+def get_full_user(user, use_cache=True):
+    """Returns the database-backed user for a (possibly token) user"""
+    if not isinstance(user, TokenUser):
+        return user
+
+    full_user = user_cache.get(user.pk) if use_cache else None
+    if full_user is None:
+        full_user = get_user_model().objects.get(pk=user.pk)
+        user_cache.set(full_user)
+    return full_user
+
@@ -1,3 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from airport.models import Order
+from user.authentication import get_full_user, user_cache
+
+TOKEN_URL = reverse("user:token_obtain_pair")
+ME_URL = reverse("user:manage_user")
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="testpassword"
+        )
+        res = self.client.post(
+            TOKEN_URL, {"email": "test@test.test", "password": "testpassword"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        user_cache.clear()
+
+    def test_read_endpoint_does_not_query_user(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user_table = get_user_model()._meta.db_table
+        for query in ctx.captured_queries:
+            self.assertNotIn(user_table, query["sql"])
+
+    def test_order_ownership_filter_works_with_token_user(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.test", password="testpassword"
+        )
+        own_order = Order.objects.create(user=self.user)
+        Order.objects.create(user=other)
+
+        res = self.client.get(ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([o["id"] for o in res.data["results"]], [own_order.id])
+
+    def test_non_staff_claim_cannot_write(self):
+        res = self.client.post(reverse("airport:country-list"), {"name": "Test"})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_manage_user_loads_full_user(self):
+        res = self.client.patch(ME_URL, {"password": "newpassword"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("newpassword"))
+
+    def test_token_user_is_loaded_for_writes(self):
+        user = TokenUser(AccessToken.for_user(self.user))
+
+        with self.assertRaises(NotImplementedError):
+            user.save()
+        self.assertEqual(get_full_user(user), self.user)
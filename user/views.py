@@ -1,8 +1,9 @@
 from rest_framework import generics
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.settings import api_settings
 
+from user.authentication import get_full_user, user_cache
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -16,4 +17,11 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        return get_full_user(
+            self.request.user,
+            use_cache=self.request.method in SAFE_METHODS,
+        )
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        user_cache.invalidate(serializer.instance.pk)